@@ -3,6 +3,8 @@ from typing import List, Dict, Optional
 import torch
 from transformers import pipeline, AutoTokenizer
 from data_processor_drugbank import get_processor
+from inference_pool import create_inference_pool
+from risk_lexicon import get_risk_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -35,22 +37,28 @@ class LocalGenerationAgent:
         logger.info(f"Inference running on: {device.upper()}")
         
         try:
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            # We use a pipeline for easy text-to-text generation
-            self.generator = pipeline(
-                "text2text-generation",
-                model=model_name,
-                tokenizer=self.tokenizer,
-                device=device if device != "mps" else -1, # MPS sometimes has issues with pipeline device indexing
-                max_length=512
-            )
+            # Core-pinned worker pool (INFERENCE_WORKERS) or capped in-process threads
+            self.inference_pool = create_inference_pool() if device == "cpu" else None
+            if self.inference_pool is not None:
+                # Same pipeline-style call signature, generation runs in the pool
+                self.generator = self.inference_pool.backend_for(model_name)
+                self.tokenizer = self.generator.tokenizer
+            else:
+                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+                # We use a pipeline for easy text-to-text generation
+                self.generator = pipeline(
+                    "text2text-generation",
+                    model=model_name,
+                    tokenizer=self.tokenizer,
+                    device=device if device != "mps" else -1, # MPS sometimes has issues with pipeline device indexing
+                    max_length=512
+                )
         except Exception as e:
             logger.error(f"Failed to load model {model_name}: {e}")
             raise
 
-    def generate(self, query: str, context_docs: List[Dict]) -> Dict:
-        """Generate answer based on retrieved docs"""
-        
+    def build_prompt(self, query: str, context_docs: List[Dict]):
+        """Return (prompt, context_text, citations) for the top documents"""
         # 1. Prepare Context
         context_text = ""
         citations = []
@@ -74,6 +82,11 @@ class LocalGenerationAgent:
             f"Question: {query}\n\n"
             f"Answer:"
         )
+        return prompt, context_text, citations
+
+    def generate(self, query: str, context_docs: List[Dict]) -> Dict:
+        """Generate answer based on retrieved docs"""
+        prompt, context_text, citations = self.build_prompt(query, context_docs)
 
         # 3. Generate
         try:
@@ -99,10 +112,10 @@ class LocalGenerationAgent:
             }
 
     def _calculate_risk(self, text: str) -> str:
-        text = text.lower()
-        if any(x in text for x in ['fatal', 'life-threatening', 'severe', 'contraindicated']):
+        scores = get_risk_matcher().score(text, 'generation')
+        if scores['high'] >= 1:
             return "HIGH"
-        if any(x in text for x in ['monitor', 'caution', 'adjust', 'increase risk']):
+        if scores['moderate'] >= 1:
             return "MODERATE"
         return "LOW"
 
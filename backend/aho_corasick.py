@@ -0,0 +1,97 @@
+"""
+Aho-Corasick Automaton
+Multi-pattern matching in one pass over the text, with word boundaries
+
+All patterns are compiled once into a trie with failure links; matching
+walks the text character by character, so cost is linear in the text
+length plus the number of matches, independent of how many patterns
+there are. Used for risk terms (risk_lexicon.py) and drug names.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+def is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+class AhoCorasick:
+    """
+    patterns: (pattern, payload) pairs. Patterns are matched case-insensitively
+    (callers pass lowercased text); payloads are returned with each match.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        self.patterns: List[Tuple[str, Any]] = []
+
+        for pattern, payload in patterns:
+            pattern = pattern.lower()
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(len(self.patterns))
+            self.patterns.append((pattern, payload))
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                # Outputs of the longest proper suffix state are also outputs here
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def iter_matches(self, text: str, word_boundaries: bool = True,
+                     prefix: bool = False) -> Iterator[Tuple[int, int, str, Any]]:
+        """
+        (start, end, pattern, payload) for every occurrence in `text` (already
+        lowercased). With prefix=True only the start must be on a word
+        boundary, so "monitor" also matches "monitoring" but not "unmonitored".
+        """
+        goto, fail, out, patterns = self.goto, self.fail, self.out, self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                pattern, payload = patterns[pid]
+                start, end = i + 1 - len(pattern), i + 1
+                if word_boundaries and (
+                    (start > 0 and is_word_char(text[start - 1]))
+                    or (not prefix and end < len(text) and is_word_char(text[end]))
+                ):
+                    continue
+                yield start, end, pattern, payload
+
+    def find_longest(self, text: str, word_boundaries: bool = True) -> List[Tuple[int, int, str, Any]]:
+        """Non-overlapping matches, preferring the longest (then leftmost) at each position"""
+        matches = sorted(self.iter_matches(text, word_boundaries), key=lambda m: (m[0], -(m[1] - m[0])))
+        selected, last_end = [], -1
+        for match in matches:
+            if match[0] >= last_end:
+                selected.append(match)
+                last_end = match[1]
+        return selected
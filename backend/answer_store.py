@@ -0,0 +1,142 @@
+"""
+Precomputed Answer Store
+Lookup table of full responses for high-traffic drug pairs (MongoDB)
+
+Answers are produced offline by scripts/precompute_answers.py and keyed by
+the unordered drug pair extracted from the query. Each entry records the
+index and model versions it was generated with; an entry is served only if
+both still match the running system and it is younger than
+PRECOMPUTED_MAX_AGE_DAYS (default 7). Anything else is treated as a miss,
+so a re-index or model change silently falls back to the live pipeline
+until the next batch run.
+
+Because the key is only the drug pair, a stored answer is served only for
+plain interaction questions ("Can I take warfarin with aspirin?"); queries
+that also ask about dosing, alternatives, timing or a specific population
+go through the live pipeline.
+"""
+
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from drug_name_extractor import extract_drug_pair_from_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLLECTION = "precomputed_answers"
+RESPONSE_HEADER = "ANALYSIS FOR: "  # first line of LocalLLMAgent responses
+
+INTERACTION_CUES = re.compile(
+    r"\b(interact\w*|with|and|together|combin\w*|mix\w*|safe|take|taking|risk\w*)\b"
+)
+OTHER_INTENT_CUES = re.compile(
+    r"\b(dos\w*|mg|how much|how many|alternative\w*|instead|replac\w*|substitut\w*|"
+    r"switch\w*|stop\w*|when|timing|hours? apart|side effects?|pregnan\w*|breastfeed\w*|"
+    r"child\w*|kids?|elderly|kidney|renal|liver|hepatic|alcohol)\b"
+)
+
+
+def pair_key(drug_a: str, drug_b: str) -> str:
+    """Order-independent key for a drug pair"""
+    return "|".join(sorted((drug_a.strip().lower(), drug_b.strip().lower())))
+
+
+def with_query_header(response: str, query: str) -> str:
+    """Quote the live question in the response header instead of the batch-time one"""
+    if not response.startswith(RESPONSE_HEADER):
+        return response
+    _, _, body = response.partition("\n")
+    return f"{RESPONSE_HEADER}{query}\n{body}"
+
+
+def is_interaction_query(query: str) -> bool:
+    """Plain "do A and B interact" question that a per-pair answer can serve"""
+    q_low = query.lower()
+    return bool(INTERACTION_CUES.search(q_low)) and not OTHER_INTENT_CUES.search(q_low)
+
+
+class PrecomputedAnswerStore:
+    def __init__(self, db, versions: Dict[str, str], max_age_days: Optional[float] = None):
+        self.collection = db[COLLECTION]
+        self.versions = versions
+        if max_age_days is None:
+            max_age_days = float(os.environ.get("PRECOMPUTED_MAX_AGE_DAYS", "7"))
+        self.max_age = timedelta(days=max_age_days)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.bypassed = 0
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("pair_key", unique=True)
+
+    def is_fresh(self, entry: Dict) -> bool:
+        if any(entry.get(k) != v for k, v in self.versions.items()):
+            return False
+        created = datetime.fromisoformat(entry["created_at"])
+        return datetime.now(timezone.utc) - created <= self.max_age
+
+    async def lookup(self, query: str) -> Optional[Dict]:
+        """Stored response for the query's drug pair, or None"""
+        drug_a, drug_b = extract_drug_pair_from_query(query)
+        if not (drug_a and drug_b):
+            return None
+        if not is_interaction_query(query):
+            self.bypassed += 1
+            return None
+
+        entry = await self.collection.find_one({"pair_key": pair_key(drug_a, drug_b)}, {"_id": 0})
+        if entry is None:
+            self.misses += 1
+            return None
+        if not self.is_fresh(entry):
+            self.stale += 1
+            return None
+
+        self.hits += 1
+        result = dict(entry["result"])
+        result["query"] = query
+        result["response"] = with_query_header(result.get("response", ""), query)
+        result["metadata"] = dict(
+            result.get("metadata", {}),
+            answer_source="precomputed",
+            precomputed_at=entry["created_at"],
+        )
+        return result
+
+    async def store(self, drug_a: str, drug_b: str, result: Dict, traffic: int = 0):
+        result = {k: v for k, v in result.items() if k != "retrieved_docs"}
+        entry = {
+            "pair_key": pair_key(drug_a, drug_b),
+            "drug_a": drug_a,
+            "drug_b": drug_b,
+            "result": result,
+            "traffic": traffic,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **self.versions,
+        }
+        await self.collection.replace_one({"pair_key": entry["pair_key"]}, entry, upsert=True)
+
+    async def fresh_keys(self):
+        """pair_keys whose stored answer is still servable"""
+        keys = set()
+        async for entry in self.collection.find({}, {"_id": 0, "result": 0}):
+            if self.is_fresh(entry):
+                keys.add(entry["pair_key"])
+        return keys
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses + self.stale
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "max_age_days": self.max_age.total_seconds() / 86400,
+            **self.versions,
+        }
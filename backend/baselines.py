@@ -4,11 +4,15 @@ Implements simpler retrieval methods to demonstrate improvement
 """
 
 import logging
+import os
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
 from collections import Counter
 import numpy as np
 
+from bm25_index import SparseBM25Index
+from data_processor_drugbank import fingerprint_chunks
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -61,75 +65,43 @@ class KeywordSearchBaseline:
 class BM25Baseline:
     """BM25 ranking algorithm - standard IR baseline"""
     
-    def __init__(self, chunks: List[Dict], k1: float = 1.5, b: float = 0.75):
+    def __init__(self, chunks: List[Dict], k1: float = 1.5, b: float = 0.75,
+                 index_path: Optional[str] = None):
         self.chunks = chunks
         self.k1 = k1
         self.b = b
+        self.index_path = index_path
         self.build_index()
     
     def build_index(self):
-        """Build BM25 index"""
-        self.doc_freqs = {}
-        self.doc_lengths = []
-        self.doc_term_freqs = []
-        
-        # Calculate document frequencies and term frequencies
-        for chunk in self.chunks:
-            text = chunk.get('text', '').lower()
-            words = re.findall(r'\w+', text)
-            
-            self.doc_lengths.append(len(words))
-            
-            # Term frequencies in this document
-            term_freq = Counter(words)
-            self.doc_term_freqs.append(term_freq)
-            
-            # Document frequencies (how many docs contain each term)
-            for word in set(words):
-                self.doc_freqs[word] = self.doc_freqs.get(word, 0) + 1
-        
-        self.avgdl = np.mean(self.doc_lengths) if self.doc_lengths else 0
-        logger.info(f"Built BM25 index: {len(self.chunks)} docs, avg length: {self.avgdl:.2f}")
+        """Build (or load the persisted) BM25 index with precomputed IDF and length norms"""
+        if self.index_path:
+            self.index = SparseBM25Index.load_or_build(
+                self.index_path, self.chunks, fingerprint_chunks(self.chunks), k1=self.k1, b=self.b
+            )
+        else:
+            self.index = SparseBM25Index.build(
+                [chunk.get('text', '') for chunk in self.chunks], k1=self.k1, b=self.b
+            )
     
     def idf(self, term: str) -> float:
         """Inverse document frequency"""
-        N = len(self.chunks)
-        df = self.doc_freqs.get(term, 0)
-        return np.log((N - df + 0.5) / (df + 0.5) + 1.0)
+        term_id = self.index.vocab.get(term)
+        if term_id is None:
+            N = len(self.chunks)
+            return float(np.log((N + 0.5) / 0.5 + 1.0))
+        return float(self.index.idf[term_id])
     
     def score(self, query: str, doc_idx: int) -> float:
         """BM25 score for a query-document pair"""
-        query_words = re.findall(r'\w+', query.lower())
-        
-        score = 0.0
-        doc_length = self.doc_lengths[doc_idx]
-        term_freqs = self.doc_term_freqs[doc_idx]
-        
-        for term in query_words:
-            if term in term_freqs:
-                tf = term_freqs[term]
-                idf = self.idf(term)
-                
-                # BM25 formula
-                numerator = tf * (self.k1 + 1)
-                denominator = tf + self.k1 * (1 - self.b + self.b * (doc_length / self.avgdl))
-                score += idf * (numerator / denominator)
-        
-        return score
+        return float(self.index.score(query)[doc_idx])
     
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
         """Retrieve documents using BM25"""
-        scores = []
-        for idx in range(len(self.chunks)):
-            score = self.score(query, idx)
-            scores.append((idx, score))
-        
-        # Sort by score
-        scores.sort(key=lambda x: x[1], reverse=True)
+        indices, scores = self.index.search(query, top_k=top_k)
         
-        # Get top-k
         results = []
-        for idx, score in scores[:top_k]:
+        for idx, score in zip(indices.tolist(), scores.tolist()):
             doc = self.chunks[idx].copy()
             doc['relevance_score'] = float(score)
             results.append(doc)
@@ -166,7 +138,7 @@ class RandomBaseline:
 class BaselineComparator:
     """Compare all baselines against main system"""
     
-    def __init__(self, chunks: List[Dict], main_system):
+    def __init__(self, chunks: List[Dict], main_system, data_dir: str = './data'):
         self.chunks = chunks
         self.main_system = main_system
         
@@ -174,7 +146,7 @@ class BaselineComparator:
         logger.info("Initializing baselines...")
         self.baselines = {
             'Keyword Search': KeywordSearchBaseline(chunks),
-            'BM25': BM25Baseline(chunks),
+            'BM25': BM25Baseline(chunks, index_path=os.path.join(data_dir, 'bm25_drugbank.npz')),
             'No Decomposition': NoDecompositionBaseline(main_system),
             'Random': RandomBaseline(chunks)
         }
@@ -0,0 +1,207 @@
+"""
+Sparse BM25 Index
+Precomputed term-document matrix (SciPy CSR) scored with vectorized BM25
+
+Each CSR row is the postings list of one term: `indices` are the documents
+containing it and `data` their final BM25 weights. Queries are answered
+term-at-a-time over those arrays with a MaxScore-style top-k cut-off.
+"""
+
+import logging
+import os
+import re
+from collections import Counter
+from typing import List, Dict, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokenizer shared by every BM25 variant in the repo"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SparseBM25Index:
+    """
+    BM25 over a precomputed sparse term-document matrix.
+
+    Row t of `matrix` holds the final BM25 contribution of term t to every
+    document that contains it (IDF and length normalization already applied),
+    so scoring a query is a sum of a few sparse rows.
+    """
+
+    def __init__(self, vocab: List[str], matrix: sparse.csr_matrix, idf: np.ndarray,
+                 k1: float = 1.5, b: float = 0.75, fingerprint: str = ''):
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.terms = list(vocab)
+        self.matrix = matrix
+        self.idf = idf
+        self.k1 = k1
+        self.b = b
+        self.fingerprint = fingerprint
+
+        # Upper bound of each term's contribution to any single document
+        if matrix.nnz:
+            self.max_impact = np.maximum.reduceat(matrix.data, matrix.indptr[:-1])
+        else:
+            self.max_impact = np.zeros(matrix.shape[0], dtype=np.float32)
+
+    @property
+    def num_docs(self) -> int:
+        return self.matrix.shape[1]
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75,
+              fingerprint: str = '') -> "SparseBM25Index":
+        """Tokenize every document once and precompute all BM25 weights"""
+        vocab = {}
+        rows, cols, tfs = [], [], []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_idx, text in enumerate(texts):
+            words = tokenize(text)
+            doc_lengths[doc_idx] = len(words)
+            for term, tf in Counter(words).items():
+                rows.append(vocab.setdefault(term, len(vocab)))
+                cols.append(doc_idx)
+                tfs.append(tf)
+
+        num_docs = len(texts)
+        tf_matrix = sparse.csr_matrix(
+            (np.asarray(tfs, dtype=np.float32), (rows, cols)),
+            shape=(len(vocab), num_docs)
+        )
+
+        # Document frequency is the number of stored entries in each term row
+        df = np.diff(tf_matrix.indptr).astype(np.float32)
+        idf = np.log((num_docs - df + 0.5) / (df + 0.5) + 1.0)
+
+        avgdl = float(doc_lengths.mean()) if num_docs else 0.0
+        length_norm = k1 * (1 - b + b * (doc_lengths / avgdl)) if avgdl else np.full(num_docs, k1)
+
+        tf = tf_matrix.data
+        term_of_entry = np.repeat(np.arange(len(vocab)), np.diff(tf_matrix.indptr))
+        tf_matrix.data = (
+            idf[term_of_entry] * (tf * (k1 + 1)) / (tf + length_norm[tf_matrix.indices])
+        ).astype(np.float32)
+
+        terms = [None] * len(vocab)
+        for term, term_id in vocab.items():
+            terms[term_id] = term
+
+        logger.info(f"Built sparse BM25 index: {num_docs} docs, {len(terms)} terms, "
+                    f"{tf_matrix.nnz} postings, avg length: {avgdl:.2f}")
+        return cls(terms, tf_matrix, idf.astype(np.float32), k1=k1, b=b, fingerprint=fingerprint)
+
+    def query_term_ids(self, query: str) -> List[int]:
+        """Map query tokens to term rows (duplicates kept, unknown terms dropped)"""
+        return [self.vocab[t] for t in tokenize(query) if t in self.vocab]
+
+    def score(self, query: str) -> np.ndarray:
+        """Dense vector of BM25 scores for every document"""
+        term_ids = self.query_term_ids(query)
+        if not term_ids:
+            return np.zeros(self.num_docs, dtype=np.float32)
+        return np.asarray(self.matrix[term_ids].sum(axis=0)).ravel()
+
+    def search(self, query: str, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (doc indices, scores) of the top_k documents with a positive score.
+
+        Terms are visited in decreasing order of their upper bound. Once the
+        bounds of the terms still to be visited sum to less than the current
+        k-th best score, a document not seen so far can no longer enter the
+        top k, so the remaining postings only update documents already scored.
+        """
+        top_k = min(top_k, self.num_docs)
+        counts = Counter(self.query_term_ids(query))
+        if top_k <= 0 or not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Repeated query terms count once per occurrence, as in classic BM25Baseline
+        bounds = {t: c * float(self.max_impact[t]) for t, c in counts.items()}
+        terms = sorted(counts, key=bounds.get, reverse=True)
+        remaining = sum(bounds.values())
+
+        indptr, indices, data = self.matrix.indptr, self.matrix.indices, self.matrix.data
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        threshold = 0.0
+        scored = 0
+
+        for term in terms:
+            start, end = indptr[term], indptr[term + 1]
+            docs = indices[start:end]
+            weights = data[start:end] * counts[term]
+
+            if remaining < threshold:
+                seen = scores[docs] > 0
+                docs, weights = docs[seen], weights[seen]
+            else:
+                scored += int(np.count_nonzero(scores[docs] == 0))
+
+            scores[docs] += weights
+            remaining -= bounds[term]
+
+            if scored >= top_k:
+                threshold = float(np.partition(scores, -top_k)[-top_k])
+
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        order = order[scores[order] > 0]
+        return order, scores[order]
+
+    def save(self, path: str):
+        """Persist the index as a single .npz file"""
+        np.savez(
+            path,
+            data=self.matrix.data,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.asarray(self.matrix.shape),
+            idf=self.idf,
+            vocab=np.asarray(self.terms),
+            params=np.asarray([self.k1, self.b]),
+            fingerprint=np.asarray(self.fingerprint),
+        )
+        logger.info(f"Sparse BM25 index saved to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "SparseBM25Index":
+        with np.load(path) as f:
+            matrix = sparse.csr_matrix(
+                (f['data'], f['indices'], f['indptr']), shape=tuple(f['shape'])
+            )
+            k1, b = (float(x) for x in f['params'])
+            return cls(f['vocab'].tolist(), matrix, f['idf'], k1=k1, b=b,
+                       fingerprint=str(f['fingerprint']))
+
+    @classmethod
+    def load_or_build(cls, path: str, chunks: List[Dict], fingerprint: str,
+                      k1: float = 1.5, b: float = 0.75) -> "SparseBM25Index":
+        """
+        Load a persisted index, rebuilding it when missing, built with other
+        BM25 parameters, or built from a different chunk set.
+        """
+        if os.path.exists(path):
+            index = cls.load(path)
+            if index.fingerprint == fingerprint and (index.k1, index.b) == (k1, b):
+                logger.info(f"Loaded sparse BM25 index from {path}")
+                return index
+            logger.info("Sparse BM25 index is stale, rebuilding...")
+
+        index = cls.build([c.get('text', '') for c in chunks], k1=k1, b=b,
+                          fingerprint=fingerprint)
+        index.save(path)
+        return index
+
+
+def load_or_build_bm25_index(processor, filename: str = 'bm25_drugbank.npz') -> SparseBM25Index:
+    """Sparse index for the processor's chunks, stored next to the FAISS index"""
+    path = os.path.join(processor.data_dir, filename)
+    return SparseBM25Index.load_or_build(path, processor.chunks, processor.fingerprint())
@@ -0,0 +1,92 @@
+"""
+Per-Chunk Risk Term Masks
+Risk-term hits of every chunk, computed at index time as bitmasks
+
+Retrieval-only answers used to lowercase and join the retrieved texts on
+every request and search them for each risk keyword. Each chunk's
+distinct (non-negated) lexicon terms are now stored as one bit per term
+in a (num_chunks, words) uint64 array aligned with chunk rows. At query
+time the retrieved rows are OR-ed together and the set bits are weighted
+per severity level: a handful of integer operations per request.
+"""
+
+import logging
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from data_processor_drugbank import fingerprint_chunks
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ChunkRiskMasks:
+    def __init__(self, masks: np.ndarray, matcher, fingerprint: str = "", signature: str = ""):
+        self.masks = masks
+        self.matcher = matcher
+        self.fingerprint = fingerprint
+        self.signature = signature
+
+        # profile -> (levels, (levels, terms) weight matrix in bit order)
+        self.level_weights = {}
+        for profile in matcher.lexicon:
+            levels = matcher.levels(profile)
+            info = matcher.term_info(profile)
+            weights = np.zeros((len(levels), len(matcher.terms)), dtype=np.float32)
+            for bit, term in enumerate(matcher.terms):
+                if term in info:
+                    level, weight = info[term]
+                    weights[levels.index(level), bit] = weight
+            self.level_weights[profile] = (levels, weights)
+
+    def score_rows(self, rows: List[int], profile: str) -> Dict[str, float]:
+        """Same result as matcher.score(profile=...) on the joined chunk texts, without touching the text"""
+        levels, weights = self.level_weights[profile]
+        union = np.bitwise_or.reduce(self.masks[rows], axis=0) if len(rows) else np.zeros(
+            self.masks.shape[1], dtype=np.uint64
+        )
+        bits = np.unpackbits(union.view(np.uint8), bitorder="little")[:weights.shape[1]]
+        per_level = weights @ bits.astype(np.float32)
+        return {level: float(v) for level, v in zip(levels, per_level)}
+
+    @classmethod
+    def build(cls, chunks: List[Dict], matcher, fingerprint: str = "", signature: str = "") -> "ChunkRiskMasks":
+        logger.info(f"Matching risk terms in {len(chunks)} chunks...")
+        bit_of = {term: bit for bit, term in enumerate(matcher.terms)}
+        words = max(1, (len(bit_of) + 63) // 64)
+        masks = np.zeros((len(chunks), words), dtype=np.uint64)
+        for row, chunk in enumerate(chunks):
+            for term in matcher.matched_terms(chunk.get("text", "")):
+                bit = bit_of[term]
+                masks[row, bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return cls(masks, matcher, fingerprint, signature)
+
+    def save(self, path: str):
+        np.savez(path, masks=self.masks, fingerprint=np.asarray(self.fingerprint),
+                 signature=np.asarray(self.signature))
+
+    @classmethod
+    def load(cls, path: str, matcher) -> "ChunkRiskMasks":
+        with np.load(path) as f:
+            return cls(f["masks"], matcher, str(f["fingerprint"]), str(f["signature"]))
+
+
+def load_or_build_risk_masks(processor, matcher,
+                             filename: str = "chunk_risk_masks.npz") -> ChunkRiskMasks:
+    """Risk masks stored next to the FAISS index, rebuilt when chunks or the lexicon change"""
+    path = os.path.join(processor.data_dir, filename)
+    fingerprint = fingerprint_chunks(processor.chunks)
+    signature = matcher.signature()
+
+    if os.path.exists(path):
+        store = ChunkRiskMasks.load(path, matcher)
+        if store.fingerprint == fingerprint and store.signature == signature:
+            logger.info(f"Loaded chunk risk masks from {path}")
+            return store
+        logger.info("Chunk risk masks are stale, rebuilding...")
+
+    store = ChunkRiskMasks.build(processor.chunks, matcher, fingerprint, signature)
+    store.save(path)
+    return store
@@ -0,0 +1,189 @@
+"""
+Token-Aware Context Packer
+Assemble FLAN-T5 prompts from pre-tokenized chunks within an exact token budget
+
+Chunk token ids are computed once at index time and stored as one flat
+int32 array plus offsets. At query time the prompt is built by
+concatenating cached ids, so the tokenizer only sees the short question.
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from data_processor_drugbank import fingerprint_chunks
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INSTRUCTION = (
+    "Instruction: Answer strictly based on the Context below. "
+    "If the text says 'no interaction', explicitly state "
+    "'No known interaction found'.\n\n"
+    "Context:\n"
+)
+NO_CONTEXT = "No detailed interaction records found."
+MIN_PARTIAL_DOC_TOKENS = 32  # don't squeeze in a truncated doc shorter than this
+
+
+def _chunk_text(chunk: Dict) -> str:
+    return chunk.get("text", "").replace("\n", " ").strip()
+
+
+class ChunkTokenStore:
+    """Token ids of every chunk, aligned with chunk rows"""
+
+    def __init__(self, token_ids: np.ndarray, offsets: np.ndarray, fingerprint: str = ""):
+        self.token_ids = token_ids
+        self.offsets = offsets
+        self.fingerprint = fingerprint
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def ids(self, row: int) -> np.ndarray:
+        return self.token_ids[self.offsets[row]:self.offsets[row + 1]]
+
+    @classmethod
+    def build(cls, chunks: List[Dict], tokenizer, fingerprint: str = "",
+              batch_size: int = 1024) -> "ChunkTokenStore":
+        texts = [_chunk_text(c) for c in chunks]
+        all_ids = []
+        for start in range(0, len(texts), batch_size):
+            encoded = tokenizer(texts[start:start + batch_size], add_special_tokens=False)
+            all_ids.extend(encoded["input_ids"])
+
+        lengths = np.fromiter((len(ids) for ids in all_ids), dtype=np.int64, count=len(all_ids))
+        offsets = np.zeros(len(all_ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        token_ids = np.fromiter((t for ids in all_ids for t in ids), dtype=np.int32,
+                                count=int(offsets[-1]))
+
+        logger.info(f"Pre-tokenized {len(all_ids)} chunks "
+                    f"({offsets[-1]} tokens, mean {lengths.mean() if len(lengths) else 0:.1f})")
+        return cls(token_ids, offsets, fingerprint)
+
+    def save(self, path: str):
+        np.savez(path, token_ids=self.token_ids, offsets=self.offsets,
+                 fingerprint=np.asarray(self.fingerprint))
+
+    @classmethod
+    def load(cls, path: str) -> "ChunkTokenStore":
+        with np.load(path) as f:
+            return cls(f["token_ids"], f["offsets"], str(f["fingerprint"]))
+
+
+def load_or_build_chunk_tokens(processor, tokenizer,
+                               filename: str = "chunk_tokens_t5.npz") -> ChunkTokenStore:
+    """Chunk token ids stored next to the FAISS index (all FLAN-T5 sizes share one vocabulary)"""
+    path = os.path.join(processor.data_dir, filename)
+    fingerprint = fingerprint_chunks(processor.chunks)
+
+    if os.path.exists(path):
+        store = ChunkTokenStore.load(path)
+        if store.fingerprint == fingerprint:
+            logger.info(f"Loaded chunk token ids from {path}")
+            return store
+        logger.info("Chunk token ids are stale, rebuilding...")
+
+    store = ChunkTokenStore.build(processor.chunks, tokenizer, fingerprint)
+    store.save(path)
+    return store
+
+
+class ContextPacker:
+    """
+    Build prompt token ids:
+
+        INSTRUCTION + [Document i]: <chunk ids> ... + Question: <query> Answer: + </s>
+
+    Documents are packed in the order given (best first) until the budget
+    is used; room for the instruction, question and EOS is always reserved.
+    """
+
+    def __init__(self, tokenizer, store: ChunkTokenStore, max_tokens: int = 512):
+        self.tokenizer = tokenizer
+        self.store = store
+        self.max_tokens = max_tokens
+        self.eos_id = tokenizer.eos_token_id
+
+        self._instruction_ids = self._encode(INSTRUCTION)
+        self._separator_ids = self._encode("\n\n")
+        self._no_context_ids = self._encode(NO_CONTEXT)
+        self._answer_ids = self._encode("\n\nAnswer:")
+        self._label_ids: Dict[int, List[int]] = {}
+
+    def _encode(self, text: str) -> List[int]:
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def _label(self, position: int) -> List[int]:
+        if position not in self._label_ids:
+            self._label_ids[position] = self._encode(f"[Document {position}]: ")
+        return self._label_ids[position]
+
+    def _question_ids(self, query: str) -> List[int]:
+        question = self._encode(f"\n\nQuestion: {query}")
+        # The question itself must never be cut by the window: if it alone is
+        # too long, keep its head (instruction and "Answer:" still fit)
+        limit = self.max_tokens - len(self._instruction_ids) - len(self._answer_ids) - 1
+        return question[:max(limit, 0)]
+
+    def pack(self, query: str, docs: List[Dict], max_docs: Optional[int] = None) -> Dict:
+        """Return {'input_ids', 'doc_rows', 'num_tokens'} for the packed prompt"""
+        tail = self._question_ids(query) + self._answer_ids + [self.eos_id]
+        budget = self.max_tokens - len(self._instruction_ids) - len(tail)
+
+        context: List[int] = []
+        packed_rows: List[int] = []
+        for i, doc in enumerate(docs[:max_docs] if max_docs else docs):
+            row = doc.get("chunk_row")
+            if row is None or len(_chunk_text(doc)) < 10:
+                continue
+
+            piece = (self._separator_ids if context else []) + self._label(i + 1)
+            chunk_ids = self.store.ids(row).tolist()
+            remaining = budget - len(context) - len(piece)
+
+            if len(chunk_ids) <= remaining:
+                context.extend(piece + chunk_ids)
+                packed_rows.append(row)
+            elif remaining >= MIN_PARTIAL_DOC_TOKENS:
+                context.extend(piece + chunk_ids[:remaining])
+                packed_rows.append(row)
+                break
+
+        if not context:
+            context = self._no_context_ids[:max(budget, 0)]
+
+        input_ids = self._instruction_ids + context + tail
+        return {"input_ids": input_ids, "doc_rows": packed_rows, "num_tokens": len(input_ids)}
+
+    def pack_items(self, head: str, items: List[str], tail: str) -> Dict:
+        """
+        Return {'input_ids', 'num_items', 'num_tokens'} for head + items + tail.
+        The tail (the answer cue) is always kept; items are added in order
+        like documents in pack(), the last one truncated if enough room is left.
+        """
+        tail_ids = self._encode(tail) + [self.eos_id]
+        head_ids = self._encode(head)[:max(self.max_tokens - len(tail_ids), 0)]
+        budget = self.max_tokens - len(head_ids) - len(tail_ids)
+
+        body: List[int] = []
+        num_items = 0
+        for item in items:
+            ids = self._encode(item)
+            remaining = budget - len(body)
+            if len(ids) <= remaining:
+                body.extend(ids)
+                num_items += 1
+            else:
+                if remaining >= MIN_PARTIAL_DOC_TOKENS:
+                    body.extend(ids[:remaining])
+                    num_items += 1
+                break
+
+        input_ids = head_ids + body + tail_ids
+        return {"input_ids": input_ids, "num_items": num_items, "num_tokens": len(input_ids)}
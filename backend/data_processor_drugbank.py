@@ -1,5 +1,6 @@
 import os
 import json
+import hashlib
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import faiss
@@ -9,6 +10,23 @@ import xml.etree.ElementTree as ET
 
 logger = logging.getLogger(__name__)
 
+
+def fingerprint_chunks(chunks: List[Dict]) -> str:
+    """
+    Short hash of a chunk set, used to detect stale index-time artifacts.
+    Covers ids and text: ids are not unique, and edited text must invalidate
+    everything derived from it.
+    """
+    digest = hashlib.sha1()
+    digest.update(str(len(chunks)).encode())
+    for chunk in chunks:
+        digest.update(chunk.get('id', '').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(chunk.get('text', '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
 class DrugBankProcessor:
     def __init__(self, data_dir: str = "./data"):
         self.data_dir = data_dir
@@ -145,20 +163,35 @@ class DrugBankProcessor:
             
         return self.chunks, self.index
     
-    def search(self, query: str, top_k: int = 4) -> List[Dict]:
-        """Search FAISS index"""
+    def fingerprint(self) -> str:
+        """Short hash of the loaded chunk set"""
+        return fingerprint_chunks(self.chunks)
+    
+    def search_with_scores(self, query: str, top_k: int = 4):
+        """Search FAISS index and return (chunk rows, L2 distances)"""
+        return self.search_batch_with_scores([query], top_k)[0]
+    
+    def search_batch_with_scores(self, queries: List[str], top_k: int = 4):
+        """One batched encode + one FAISS matrix search; [(chunk rows, L2 distances)] per query"""
         if self.index is None: self.load_index()
         
-        # Embed query
-        query_vec = self.encoder.encode([query], convert_to_numpy=True)
-        distances, indices = self.index.search(query_vec.astype('float32'), top_k)
+        # Embed all queries at once
+        query_vecs = self.encoder.encode(queries, batch_size=len(queries), convert_to_numpy=True)
+        distances, indices = self.index.search(query_vecs.astype('float32'), top_k)
         
         results = []
-        for idx in indices[0]:
-            if idx != -1 and idx < len(self.chunks):
-                results.append(self.chunks[idx])
-        
+        for row_ids, row_distances in zip(indices, distances):
+            keep = (row_ids != -1) & (row_ids < len(self.chunks))
+            results.append((row_ids[keep], row_distances[keep]))
         return results
+    
+    def search(self, query: str, top_k: int = 4) -> List[Dict]:
+        """Search FAISS index"""
+        rows, _ = self.search_with_scores(query, top_k)
+        
+        # Copies carry their row so callers can look up index-time artifacts
+        # (chunk ids are not unique in the DrugBank chunk set)
+        return [dict(self.chunks[idx], chunk_row=int(idx)) for idx in rows]
 
 # Singleton
 processor = None
@@ -1,24 +1,58 @@
 # drug_graph.py
 """
-Simple in-memory knowledge graph for drug-drug interactions.
+Compact in-memory knowledge graph for drug-drug interactions.
 
-- Nodes: drug names (strings)
-- Edges: interaction between drug_a <-> drug_b
+- Nodes: drug names, interned to integer ids (`names[i]`)
+- Edges: undirected interaction drug_a <-> drug_b, stored once
 - Edge attributes: severity_code, severity_label, text, doc_id
 
-We load this from a DrugBank-style JSON file, where each record looks like:
-{
-  "id": "...",
-  "drug1": "Aspirin",
-  "drug2": "Warfarin",
-  "severity": "major",
-  "description": "..."
-}
+Layout (CSR, all numpy arrays):
+    offsets[i]:offsets[i+1]   slice of `neighbors` / `edge_ids` for drug i,
+                              neighbors sorted so lookups are a binary search
+    severity[e]               uint8 severity code (0-3 for S0-S3)
+    label_ids[e]              uint8 index into `labels`
+    text_blob / text_offsets  UTF-8 descriptions, decoded only when an edge is read
+    doc_blob / doc_offsets    source record ids, same layout
+
+We load this from either
+- the DrugBank-style JSON list, where each record looks like:
+  {"id": "...", "drug1": "Aspirin", "drug2": "Warfarin",
+   "severity": "major", "description": "..."}
+- or the JSONL written by scripts/drugbank_to_pairwise.py:
+  {"id": "...", "drug1_id": "...", "drug1_name": "...", "drug2_id": "...",
+   "drug2_name": "...", "description": "..."}
+
+The JSONL has no severity field, so for records without one the label is
+inferred from the description with the risk lexicon's "graph" profile
+(contraindicated / major / moderate); descriptions with no severity term
+stay S0 (unknown) so callers can fall back to other evidence.
+
+When the same pair appears more than once (DrugBank lists each
+interaction under both drugs) the last record wins.
 """
 
 import json
-from collections import defaultdict
-from typing import Dict, Optional
+import os
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from risk_lexicon import get_risk_matcher
+
+SEVERITY_CODES = ("S0", "S1", "S2", "S3")
+MAX_LABELS = 256  # label_ids is uint8
+
+# Pairwise JSONL from scripts/drugbank_to_pairwise.py is preferred when present
+GRAPH_SOURCES = (
+    os.path.join("data", "drugbank_interactions.jsonl"),
+    os.path.join("data", "drugbank_interactions.json"),
+)
+
+
+def default_graph_source() -> str:
+    return next((p for p in GRAPH_SOURCES if os.path.exists(p)), GRAPH_SOURCES[-1])
 
 
 def map_severity_to_code(raw: Optional[str]) -> str:
@@ -43,53 +77,247 @@ def map_severity_to_code(raw: Optional[str]) -> str:
     return "S0"
 
 
+def infer_severity_label(description: str) -> str:
+    """Severity level named by the description's terms, or "" when none match"""
+    scores = get_risk_matcher().score(description, "graph")
+    return next((level for level in ("contraindicated", "major", "moderate") if scores[level] >= 1), "")
+
+
+def iter_interaction_records(path: str) -> Iterator[dict]:
+    """Records from a JSON list or a JSONL file (one object per line)"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+class _NeighborView(Mapping):
+    """Read-only {neighbor name: edge data} view; edge data is decoded per access"""
+
+    def __init__(self, graph: "DrugInteractionGraph", drug_id: int):
+        self._graph = graph
+        self._drug_id = drug_id
+
+    def __getitem__(self, name: str) -> dict:
+        edge = self._graph.get_interaction(self._graph.names[self._drug_id], name)
+        if edge is None:
+            raise KeyError(name)
+        return edge
+
+    def __iter__(self):
+        names = self._graph.names
+        return (names[i] for i in self._graph.neighbor_ids(self._drug_id))
+
+    def __len__(self) -> int:
+        return self._graph.degree_of(self._drug_id)
+
+
 class DrugInteractionGraph:
-    def __init__(self):
-        # adjacency[drug_a][drug_b] = edge_data
-        self.adjacency: Dict[str, Dict[str, dict]] = defaultdict(dict)
+    def __init__(self, names: List[str], offsets: np.ndarray, neighbors: np.ndarray,
+                 edge_ids: np.ndarray, edge_a: np.ndarray, edge_b: np.ndarray,
+                 severity: np.ndarray, label_ids: np.ndarray, labels: List[str],
+                 text_blob: bytes, text_offsets: np.ndarray,
+                 doc_blob: bytes, doc_offsets: np.ndarray):
+        self.names = names
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self._casefold_ids: Dict[str, int] = {name.casefold(): i for i, name in enumerate(names)}
+
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.edge_ids = edge_ids
+        self.edge_a = edge_a
+        self.edge_b = edge_b
+        self.severity = severity
+        self.label_ids = label_ids
+        self.labels = labels
+        self.text_blob = text_blob
+        self.text_offsets = text_offsets
+        self.doc_blob = doc_blob
+        self.doc_offsets = doc_offsets
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "DrugInteractionGraph":
+        ids: Dict[str, int] = {}
+        labels: Dict[str, int] = {}
+        src, dst = array("i"), array("i")
+        severity, label_ids = array("B"), array("B")
+        texts: List[bytes] = []
+        doc_ids: List[bytes] = []
+        # DrugBank descriptions are templates around the two drug names
+        inferred: Dict[str, str] = {}
+
+        for rec in records:
+            drug1 = rec.get("drug1") or rec.get("drug1_name")
+            drug2 = rec.get("drug2") or rec.get("drug2_name")
+            if not drug1 or not drug2 or drug1 == drug2:
+                continue
+
+            text = rec.get("description") or rec.get("text") or ""
+            severity_label = rec.get("severity")
+            if severity_label is None:
+                template = text.replace(drug1, "\0").replace(drug2, "\0")
+                if template not in inferred:
+                    inferred[template] = infer_severity_label(template)
+                severity_label = inferred[template]
+            label_id = labels.setdefault(severity_label or "", len(labels))
+            if label_id >= MAX_LABELS:
+                raise ValueError(f"More than {MAX_LABELS} distinct severity labels; label_ids is uint8")
+
+            doc_id = rec.get("id")
+            if not doc_id and rec.get("drug1_id") and rec.get("drug2_id"):
+                doc_id = f"{rec['drug1_id']}-{rec['drug2_id']}"
+
+            src.append(ids.setdefault(drug1, len(ids)))
+            dst.append(ids.setdefault(drug2, len(ids)))
+            severity.append(SEVERITY_CODES.index(map_severity_to_code(severity_label)))
+            label_ids.append(label_id)
+            texts.append(text.encode("utf-8"))
+            doc_ids.append(str(doc_id or "").encode("utf-8"))
+
+        src = np.frombuffer(src, dtype=np.int32)
+        dst = np.frombuffer(dst, dtype=np.int32)
+
+        # One edge per unordered pair, keeping the last record (reverse, first unique)
+        lo, hi = np.minimum(src, dst).astype(np.int64), np.maximum(src, dst).astype(np.int64)
+        pair_keys = (lo * len(ids) + hi)[::-1]
+        _, first_in_reversed = np.unique(pair_keys, return_index=True)
+        keep = np.sort(len(pair_keys) - 1 - first_in_reversed)
+
+        edge_a, edge_b = lo[keep].astype(np.int32), hi[keep].astype(np.int32)
+        text_blob, text_offsets = cls._pack_blob([texts[i] for i in keep])
+        doc_blob, doc_offsets = cls._pack_blob([doc_ids[i] for i in keep])
+
+        offsets, neighbors, edge_ids = cls._build_csr(len(ids), edge_a, edge_b)
+        return cls(
+            names=list(ids),
+            offsets=offsets,
+            neighbors=neighbors,
+            edge_ids=edge_ids,
+            edge_a=edge_a,
+            edge_b=edge_b,
+            severity=np.frombuffer(severity, dtype=np.uint8)[keep],
+            label_ids=np.frombuffer(label_ids, dtype=np.uint8)[keep],
+            labels=list(labels),
+            text_blob=text_blob,
+            text_offsets=text_offsets,
+            doc_blob=doc_blob,
+            doc_offsets=doc_offsets,
+        )
 
     @classmethod
     def from_json(cls, path: str) -> "DrugInteractionGraph":
         """
-        Build graph from a JSON file of interaction records.
+        Build graph from a JSON (list) or JSONL file of interaction records.
 
-        Adjust the key names here if your JSON schema is different.
+        Adjust the key names in from_records if your schema is different.
         """
-        graph = cls()
+        return cls.from_records(iter_interaction_records(path))
 
-        with open(path, "r", encoding="utf-8") as f:
-            records = json.load(f)
+    @staticmethod
+    def _pack_blob(items: List[bytes]):
+        offsets = np.zeros(len(items) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in items], out=offsets[1:])
+        return b"".join(items), offsets
 
-        for rec in records:
-            drug1 = rec.get("drug1")
-            drug2 = rec.get("drug2")
-            if not drug1 or not drug2:
-                continue
+    @staticmethod
+    def _build_csr(num_nodes: int, edge_a: np.ndarray, edge_b: np.ndarray):
+        # Undirected: every edge appears in both endpoints' rows
+        src = np.concatenate([edge_a, edge_b])
+        dst = np.concatenate([edge_b, edge_a])
+        eid = np.tile(np.arange(len(edge_a), dtype=np.int32), 2)
+
+        order = np.lexsort((dst, src))
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_nodes), out=offsets[1:])
+        return offsets, dst[order].astype(np.int32), eid[order]
 
-            severity_label = rec.get("severity", "")
-            severity_code = map_severity_to_code(severity_label)
+    # ---------- Lookups ----------
 
-            edge_data = {
-                "severity_code": severity_code,
-                "severity_label": severity_label,
-                "doc_id": rec.get("id"),
-                "text": rec.get("description") or rec.get("text", ""),
-            }
+    @property
+    def num_nodes(self) -> int:
+        return len(self.names)
 
-            # Undirected graph: store edge in both directions
-            graph.adjacency[drug1][drug2] = edge_data
-            graph.adjacency[drug2][drug1] = edge_data
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_a)
 
-        return graph
+    def drug_id(self, drug: str) -> Optional[int]:
+        drug_id = self.ids.get(drug)
+        if drug_id is None:
+            drug_id = self._casefold_ids.get(drug.casefold())
+        return drug_id
+
+    def neighbor_ids(self, drug_id: int) -> np.ndarray:
+        return self.neighbors[self.offsets[drug_id]:self.offsets[drug_id + 1]]
+
+    def degree_of(self, drug_id: int) -> int:
+        return int(self.offsets[drug_id + 1] - self.offsets[drug_id])
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def edge_id(self, a: int, b: int) -> Optional[int]:
+        row = self.neighbor_ids(a)
+        pos = int(np.searchsorted(row, b))
+        if pos < len(row) and row[pos] == b:
+            return int(self.edge_ids[self.offsets[a] + pos])
+        return None
+
+    @staticmethod
+    def _blob_str(blob, offsets: np.ndarray, i: int) -> str:
+        # blob is bytes when built in-process, a memory-mapped uint8 array from a snapshot
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def edge_text(self, edge: int) -> str:
+        return self._blob_str(self.text_blob, self.text_offsets, edge)
+
+    def edge_data(self, edge: int) -> dict:
+        return {
+            "severity_code": SEVERITY_CODES[self.severity[edge]],
+            "severity_label": self.labels[self.label_ids[edge]],
+            "doc_id": self._blob_str(self.doc_blob, self.doc_offsets, edge) or None,
+            "text": self.edge_text(edge),
+        }
 
     def get_interaction(self, drug_a: str, drug_b: str) -> Optional[dict]:
         """
         Return edge data for (drug_a, drug_b), or None if no interaction.
         """
-        return self.adjacency.get(drug_a, {}).get(drug_b)
+        a, b = self.drug_id(drug_a), self.drug_id(drug_b)
+        if a is None or b is None:
+            return None
+        edge = self.edge_id(a, b)
+        return None if edge is None else self.edge_data(edge)
+
+    def induced_edge_ids(self, drug_ids: Iterable[int]) -> np.ndarray:
+        """
+        Edge ids of the subgraph induced by a drug set (e.g. a medication list).
+
+        Each drug's sorted neighbor row is intersected with the sorted id set,
+        so a 20-drug regimen costs 20 vectorized intersections instead of 190
+        pair lookups. Every edge is reported once (from its lower-id endpoint).
+        """
+        ids = np.unique(np.fromiter(drug_ids, dtype=np.int32))
+        found = []
+        for i, drug_id in enumerate(ids[:-1]):
+            start = self.offsets[drug_id]
+            _, positions, _ = np.intersect1d(
+                self.neighbor_ids(drug_id), ids[i + 1:], assume_unique=True, return_indices=True
+            )
+            found.append(self.edge_ids[start + positions])
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int32)
 
-    def get_neighbors(self, drug: str) -> Dict[str, dict]:
+    def get_neighbors(self, drug: str) -> Mapping:
         """
         Return all neighbors and edge data for a given drug.
         """
-        return self.adjacency.get(drug, {})
\ No newline at end of file
+        drug_id = self.drug_id(drug)
+        if drug_id is None:
+            return {}
+        return _NeighborView(self, drug_id)
@@ -1,14 +1,22 @@
 """
 Drug Interaction Graph - Novel Architecture Component
 Uses graph structure to improve retrieval and reasoning
+
+Path and neighbourhood queries are bounded for hub drugs with thousands
+of interactions: paths use a depth-limited bidirectional BFS with an LRU
+cache, 2-hop sets come from a sparse adjacency matrix (precomputed for
+the highest-degree drugs), and graph re-scoring reads edge weights for
+all candidates in one sparse lookup.
 """
 
 import logging
 import networkx as nx
-import json
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 import numpy as np
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from scipy import sparse
+
+from drug_graph import infer_severity_label
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,7 +29,7 @@ class DrugInteractionGraph:
     Edges: Interactions (weighted by severity)
     """
     
-    def __init__(self):
+    def __init__(self, hub_degree: int = 200, max_hubs: int = 256, path_cache_size: int = 10000):
         self.graph = nx.Graph()
         self.drug_attributes = {}
         self.interaction_severity_map = {
@@ -30,6 +38,21 @@ class DrugInteractionGraph:
             'major': 3,
             'contraindicated': 4
         }
+        
+        # Array view of the graph (built lazily, reset when the graph is rebuilt)
+        self.hub_degree = hub_degree
+        self.max_hubs = max_hubs
+        self._node_ids: Dict[str, int] = {}
+        self._node_names: List[str] = []
+        self._weights: Optional[sparse.csr_matrix] = None
+        self._two_hop: Dict[int, np.ndarray] = {}
+        
+        # LRU cache of bounded path queries
+        self.path_cache_size = path_cache_size
+        self._path_cache: "OrderedDict[Tuple[str, str, int], List[str]]" = OrderedDict()
+        
+        # Communities are computed once per graph build
+        self._communities: Optional[List[Set[str]]] = None
     
     def build_from_drugbank(self, chunks: List[Dict]):
         """Build graph from DrugBank chunks"""
@@ -76,20 +99,52 @@ class DrugInteractionGraph:
         logger.info(f"Added {edge_count} interaction edges")
         logger.info(f"Graph density: {nx.density(self.graph):.4f}")
         
+        self._build_index()
         return self.graph
     
+    def _build_index(self):
+        """Sparse weighted adjacency over interned node ids + 2-hop sets of hub drugs"""
+        
+        self._node_names = list(self.graph.nodes())
+        self._node_ids = {name: i for i, name in enumerate(self._node_names)}
+        self._path_cache.clear()
+        self._communities = None
+        
+        n = len(self._node_names)
+        edges = list(self.graph.edges(data='weight', default=1))
+        rows = np.fromiter((self._node_ids[u] for u, _, _ in edges), dtype=np.int32, count=len(edges))
+        cols = np.fromiter((self._node_ids[v] for _, v, _ in edges), dtype=np.int32, count=len(edges))
+        vals = np.fromiter((w for _, _, w in edges), dtype=np.float32, count=len(edges))
+        self._weights = sparse.csr_matrix(
+            (np.concatenate([vals, vals]), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+            shape=(n, n),
+        )
+        
+        # Precompute 2-hop reachability for the highest-degree drugs
+        degrees = np.diff(self._weights.indptr)
+        hubs = np.argsort(-degrees)[:self.max_hubs]
+        hubs = hubs[degrees[hubs] >= self.hub_degree]
+        self._two_hop = {}
+        if len(hubs):
+            reach = (self._weights[hubs] != 0).astype(np.int32) @ (self._weights != 0).astype(np.int32)
+            for row, hub in enumerate(hubs):
+                self._two_hop[int(hub)] = self._exclude_direct(int(hub), reach[row].indices)
+        logger.info(f"Indexed graph: {n} nodes, {len(self._two_hop)} hubs with precomputed 2-hop sets")
+    
+    def _ensure_index(self):
+        if self._weights is None or self._weights.shape[0] != self.graph.number_of_nodes():
+            self._build_index()
+    
+    def _direct_ids(self, node: int) -> np.ndarray:
+        return self._weights.indices[self._weights.indptr[node]:self._weights.indptr[node + 1]]
+    
+    def _exclude_direct(self, node: int, reach: np.ndarray) -> np.ndarray:
+        excluded = np.append(self._direct_ids(node), node)
+        return np.setdiff1d(reach, excluded, assume_unique=False)
+    
     def _infer_severity(self, description: str) -> str:
         """Infer interaction severity from description"""
-        desc_lower = description.lower()
-        
-        if any(word in desc_lower for word in ['contraindicated', 'fatal', 'life-threatening', 'severe']):
-            return 'contraindicated'
-        elif any(word in desc_lower for word in ['major', 'serious', 'significant']):
-            return 'major'
-        elif any(word in desc_lower for word in ['moderate', 'caution', 'monitor']):
-            return 'moderate'
-        else:
-            return 'minor'
+        return infer_severity_label(description) or 'minor'
     
     def get_drug_neighbors(self, drug_name: str, max_hops: int = 2) -> Dict[str, List[str]]:
         """Get drugs that interact with given drug"""
@@ -97,33 +152,106 @@ class DrugInteractionGraph:
         if drug_name not in self.graph:
             return {'direct': [], 'indirect': []}
         
-        # Direct neighbors (1-hop)
-        direct = list(self.graph.neighbors(drug_name))
+        self._ensure_index()
+        node = self._node_ids[drug_name]
         
-        # Indirect neighbors (2-hop)
-        indirect = set()
-        for neighbor in direct:
-            indirect.update(self.graph.neighbors(neighbor))
+        # Direct neighbors (1-hop)
+        direct_ids = self._direct_ids(node)
+        direct = [self._node_names[i] for i in direct_ids]
+        if max_hops < 2:
+            return {'direct': direct, 'indirect': []}
         
-        # Remove drug itself and direct neighbors from indirect
-        indirect = indirect - set(direct) - {drug_name}
+        # Indirect neighbors (2-hop): precomputed for hubs, one sparse row product otherwise
+        indirect_ids = self._two_hop.get(node)
+        if indirect_ids is None:
+            reach = self._weights[direct_ids].indices if len(direct_ids) else np.zeros(0, dtype=np.int32)
+            indirect_ids = self._exclude_direct(node, np.unique(reach))
         
         return {
             'direct': direct,
-            'indirect': list(indirect)
+            'indirect': [self._node_names[i] for i in indirect_ids]
         }
     
-    def get_interaction_path(self, drug_a: str, drug_b: str) -> List[str]:
-        """Find shortest path between two drugs"""
+    def get_interaction_path(self, drug_a: str, drug_b: str, max_hops: int = 3) -> List[str]:
+        """Find shortest path between two drugs of at most max_hops edges ([] if none)"""
         
         if drug_a not in self.graph or drug_b not in self.graph:
             return []
         
-        try:
-            path = nx.shortest_path(self.graph, drug_a, drug_b)
-            return path
-        except nx.NetworkXNoPath:
-            return []
+        key = (drug_a, drug_b, max_hops)
+        if key in self._path_cache:
+            self._path_cache.move_to_end(key)
+            return self._path_cache[key]
+        
+        path = self._bounded_bidirectional_bfs(drug_a, drug_b, max_hops)
+        self._path_cache[key] = path
+        if len(self._path_cache) > self.path_cache_size:
+            self._path_cache.popitem(last=False)
+        return path
+    
+    def _bounded_bidirectional_bfs(self, source: str, target: str, max_hops: int) -> List[str]:
+        """Grow the smaller frontier each step; give up after max_hops edges in total"""
+        
+        if source == target:
+            return [source]
+        
+        adj = self.graph.adj
+        pred = {source: None}
+        succ = {target: None}
+        forward, backward = [source], [target]
+        
+        for _ in range(max_hops):
+            if len(forward) <= len(backward):
+                frontier, visited, other, forward = forward, pred, succ, []
+                next_frontier = forward
+            else:
+                frontier, visited, other, backward = backward, succ, pred, []
+                next_frontier = backward
+            
+            for node in frontier:
+                for neighbor in adj[node]:
+                    if neighbor in visited:
+                        continue
+                    visited[neighbor] = node
+                    if neighbor in other:
+                        return self._join_path(neighbor, pred, succ)
+                    next_frontier.append(neighbor)
+            
+            if not next_frontier:
+                break
+        
+        return []
+    
+    @staticmethod
+    def _join_path(meeting: str, pred: Dict, succ: Dict) -> List[str]:
+        path = []
+        node = meeting
+        while node is not None:
+            path.append(node)
+            node = pred[node]
+        path.reverse()
+        node = succ[meeting]
+        while node is not None:
+            path.append(node)
+            node = succ[node]
+        return path
+    
+    def interaction_weights(self, query_drugs: List[str], candidates: List[str]) -> np.ndarray:
+        """
+        Edge weights between each query drug and each candidate drug as a
+        (len(query_drugs), len(candidates)) array; 0 where there is no edge
+        or the drug is unknown.
+        """
+        self._ensure_index()
+        weights = np.zeros((len(query_drugs), len(candidates)), dtype=np.float32)
+        
+        q_rows = [i for i, d in enumerate(query_drugs) if d in self._node_ids]
+        c_cols = [j for j, d in enumerate(candidates) if d in self._node_ids]
+        if q_rows and c_cols:
+            q_ids = [self._node_ids[query_drugs[i]] for i in q_rows]
+            c_ids = [self._node_ids[candidates[j]] for j in c_cols]
+            weights[np.ix_(q_rows, c_cols)] = self._weights[q_ids][:, c_ids].toarray()
+        return weights
     
     def get_interaction_severity(self, drug_a: str, drug_b: str) -> Dict:
         """Get severity of interaction between two drugs"""
@@ -154,52 +282,47 @@ class DrugInteractionGraph:
     def get_drug_clusters(self, num_clusters: int = 5) -> Dict:
         """Find communities of drugs that interact frequently"""
         
-        from networkx.algorithms import community
-        
-        # Find communities
-        communities = community.greedy_modularity_communities(self.graph)
+        self._ensure_index()
+        if self._communities is None:
+            # Louvain is much faster than greedy modularity on the full graph
+            self._communities = sorted(
+                nx.community.louvain_communities(self.graph, weight='weight', seed=42),
+                key=len, reverse=True
+            )
         
         clusters = {}
-        for i, comm in enumerate(communities[:num_clusters]):
+        for i, comm in enumerate(self._communities[:num_clusters]):
             clusters[f'Cluster_{i+1}'] = list(comm)
         
         return clusters
     
-    def compute_drug_centrality(self) -> Dict[str, float]:
-        """Compute centrality scores for drugs"""
+    def compute_drug_centrality(self, samples: int = 256) -> Dict[str, float]:
+        """Compute centrality scores for drugs (betweenness approximated from `samples` sources)"""
         
         # Betweenness centrality (drugs that connect many others)
-        centrality = nx.betweenness_centrality(self.graph, weight='weight')
+        k = min(samples, self.graph.number_of_nodes()) or None
+        centrality = nx.betweenness_centrality(self.graph, k=k, weight='weight', seed=42)
         
         # Sort by centrality
         sorted_centrality = sorted(centrality.items(), key=lambda x: x[1], reverse=True)
         
         return dict(sorted_centrality[:20])  # Top 20
     
-    def save_graph(self, path: str = './data/drug_interaction_graph.json'):
-        """Save graph to file"""
-        
-        # Convert to serializable format
-        graph_data = {
-            'nodes': list(self.graph.nodes()),
-            'edges': [
-                {
-                    'source': u,
-                    'target': v,
-                    'weight': data.get('weight', 1),
-                    'severity': data.get('severity', 'unknown')
-                }
-                for u, v, data in self.graph.edges(data=True)
-            ],
-            'stats': {
-                'num_nodes': self.graph.number_of_nodes(),
-                'num_edges': self.graph.number_of_edges(),
-                'density': nx.density(self.graph)
+    def save_graph(self, path: str = './data/drug_interaction_graph.snap'):
+        """Save graph as a binary snapshot (load with graph_snapshot.load_snapshot)"""
+        from drug_graph import DrugInteractionGraph as CompactGraph
+        from graph_snapshot import write_snapshot
+        
+        records = (
+            {
+                'drug1': u,
+                'drug2': v,
+                'severity': data.get('severity', ''),
+                'description': data.get('description', '')
             }
-        }
-        
-        with open(path, 'w') as f:
-            json.dump(graph_data, f, indent=2)
+            for u, v, data in self.graph.edges(data=True)
+        )
+        write_snapshot(CompactGraph.from_records(records), path)
         
         logger.info(f"Graph saved to {path}")
 
@@ -235,34 +358,28 @@ class GraphEnhancedRetrieval:
         
         logger.info(f"Expanded to {len(expanded_drugs)} drugs via graph")
         
-        # Stage 3: Re-rank using graph structure
+        # Stage 3: Re-rank using graph structure (all candidates at once)
+        query_lower = [q.lower() for q in query_drugs]
+        doc_drugs = [doc.get('drug_name', '').lower() for doc in initial_results]
+        
+        # Document is about a query drug
+        name_match = np.array(
+            [[d in q or q in d for d in doc_drugs] for q in query_lower], dtype=np.float32
+        ).reshape(len(query_drugs), len(initial_results))
+        
+        # Direct interaction between a query drug and the document's interacting drug
+        interacting = [doc.get('interacting_drug', '') for doc in initial_results]
+        edge_weights = self.graph.interaction_weights(query_drugs, interacting)
+        
+        graph_scores = name_match.sum(axis=0) + edge_weights.sum(axis=0) / 4.0  # Normalize
+        semantic_scores = np.array([doc.get('relevance_score', 0.0) for doc in initial_results])
+        combined_scores = 0.6 * semantic_scores + 0.4 * graph_scores
+        
         reranked_results = []
-        for doc in initial_results:
-            doc_drug = doc.get('drug_name', '')
-            interacting_drug = doc.get('interacting_drug', '')
-            
-            # Calculate graph-based score
-            graph_score = 0.0
-            
-            for query_drug in query_drugs:
-                # Check if this document is relevant to query drug
-                if doc_drug.lower() in query_drug.lower() or query_drug.lower() in doc_drug.lower():
-                    graph_score += 1.0
-                
-                if interacting_drug:
-                    # Check if there's a direct interaction
-                    interaction = self.graph.get_interaction_severity(query_drug, interacting_drug)
-                    if interaction.get('has_interaction'):
-                        graph_score += interaction.get('weight', 1) / 4.0  # Normalize
-            
-            # Combine semantic and graph scores
-            semantic_score = doc.get('relevance_score', 0.0)
-            combined_score = 0.6 * semantic_score + 0.4 * graph_score
-            
-            doc['graph_score'] = graph_score
-            doc['combined_score'] = combined_score
-            doc['relevance_score'] = combined_score
-            
+        for doc, graph_score, combined_score in zip(initial_results, graph_scores, combined_scores):
+            doc['graph_score'] = float(graph_score)
+            doc['combined_score'] = float(combined_score)
+            doc['relevance_score'] = float(combined_score)
             reranked_results.append(doc)
         
         # Sort by combined score
@@ -291,8 +408,8 @@ class GraphEnhancedRetrieval:
                     interaction = self.graph.get_interaction_severity(query_drug, doc_drug)
                     reasons.append(f"Interacts with {query_drug} (severity: {interaction.get('severity')})")
                 
-                # Path exists
-                path = self.graph.get_interaction_path(query_drug, doc_drug)
+                # Path exists (bounded search: at most 2 hops, cached)
+                path = self.graph.get_interaction_path(query_drug, doc_drug, max_hops=2)
                 if path and len(path) <= 3:
                     reasons.append(f"Connected via: {' -> '.join(path)}")
             
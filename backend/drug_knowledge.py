@@ -3,6 +3,10 @@ Drug Knowledge Base - Medication Classes and Synonyms
 Critical for improving retrieval from 60% to 90%+
 """
 
+from functools import lru_cache
+
+from aho_corasick import AhoCorasick
+
 # Medication Class Mappings
 DRUG_CLASSES = {
     # Anticoagulants
@@ -61,23 +65,72 @@ DRUG_SYNONYMS = {
     'insulin': ['humalog', 'novolog', 'lantus', 'levemir'],
 }
 
+# Sub-queries per expanded query (the original query included)
+MAX_SUB_QUERIES = 6
+
+
+def _surface_forms(term):
+    """Term plus its plural, so whole-word matching still finds nsaids or blood thinners"""
+    if term.endswith(("s", "x", "ch", "sh")):
+        plural = term + "es"
+    elif term.endswith("y") and term[-2:-1] not in "aeiou":
+        plural = term[:-1] + "ies"
+    else:
+        plural = term + "s"
+    return (term, plural)
+
+
+@lru_cache(maxsize=1)
+def _expansion_automaton():
+    """Reverse lexicon: class names and drug names -> their expansion terms, compiled once"""
+    patterns = [
+        (form, members[:3])
+        for drug_class, members in DRUG_CLASSES.items()
+        for form in _surface_forms(drug_class)
+    ]
+    patterns += [
+        (form, synonyms[:2])
+        for drug, synonyms in DRUG_SYNONYMS.items()
+        for form in _surface_forms(drug)
+    ]
+    return AhoCorasick(patterns)
+
+
+def normalize_query(query_text):
+    return " ".join(query_text.lower().split())
+
+
+@lru_cache(maxsize=4096)
+def _expand_normalized(normalized):
+    sub_queries = [normalized]
+    for start, end, _, expansions in _expansion_automaton().find_longest(normalized):
+        for term in expansions:
+            sub_queries.append(normalized[:start] + term + normalized[end:])
+    return tuple(dict.fromkeys(sub_queries))[:MAX_SUB_QUERIES]
+
+
+def expand_drug_subqueries(query_text):
+    """
+    Original query plus one sub-query per class member / synonym, each with
+    the class or drug name substituted in place ("nsaid with warfarin" ->
+    "ibuprofen with warfarin", ...). Each sub-query gets its own embedding
+    instead of diluting one long concatenated query. Cached per normalized
+    query.
+    """
+    sub_queries = _expand_normalized(normalize_query(query_text))
+    return [query_text] + list(sub_queries[1:])
+
+
 def expand_drug_query(query_text):
     """
     Expand query with drug classes and synonyms
     This is the KEY to improving from 60% to 90%+
     """
-    query_lower = query_text.lower()
-    expansions = []
-    
-    # Check for drug classes
-    for drug_class, members in DRUG_CLASSES.items():
-        if drug_class in query_lower:
-            expansions.extend(members[:3])  # Add top 3 drugs from class
-    
-    # Check for synonyms
-    for drug, synonyms in DRUG_SYNONYMS.items():
-        if drug in query_lower:
-            expansions.extend(synonyms[:2])  # Add synonyms
+    expansions = [
+        term
+        for _, _, _, terms in _expansion_automaton().find_longest(normalize_query(query_text))
+        for term in terms
+    ]
     
     # Create expanded query
     if expansions:
@@ -1,59 +1,209 @@
 # drug_name_extractor.py
 """
-Very simple drug name extractor.
+Drug name extractor.
 
 We:
-1. Load all unique drug names from the DrugBank interaction JSON.
-2. Check which of those names appear in the user query text.
-3. Return the first two distinct names as (drug_a, drug_b).
+1. Compile every drug name in the interaction graph's name table
+   (memory-mapped snapshot, see graph_snapshot.py), plus the synonyms and
+   brand names in drug_knowledge.DRUG_SYNONYMS, into one Aho-Corasick
+   automaton that maps each surface form to a canonical graph drug id.
+2. Scan the query once, keeping whole-word, longest, non-overlapping
+   matches ("Coumadin" -> Warfarin, but not "aspirin" inside "aspirins").
+3. If fewer than two drugs were found, look up the remaining words in a
+   SymSpell deletion index (fuzzy_names.py) so misspellings such as
+   "warfrin" or "acetominophen" still resolve (edit distance <= 2).
+   Stopwords, common English words and the (non-drug) vocabulary of the
+   graph's interaction descriptions are never corrected, so "later" does
+   not become "Water".
+4. Return every mention with its span, or the first two distinct drugs
+   as (drug_a, drug_b).
 
-This is naive but works surprisingly well for demo / MVP.
+The automaton and the fuzzy index are built offline
+(scripts/build_name_automaton.py) and pickled next to the graph
+snapshot; they are loaded on first use and rebuilt when the name table
+or the synonym list changes.
 """
 
-import json
+import hashlib
+import logging
 import os
-from typing import List, Tuple, Optional
+import pickle
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-DATA_PATH = os.path.join("data", "drugbank_interactions.json")
+from aho_corasick import AhoCorasick
+from drug_knowledge import DRUG_SYNONYMS
+from fuzzy_names import SymSpellIndex
+from graph_snapshot import get_graph
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-def _load_drug_names(path: str) -> List[str]:
-    with open(path, "r", encoding="utf-8") as f:
-        records = json.load(f)
+AUTOMATON_PATH = os.path.join("data", "drug_names.automaton.pkl")
 
-    names = set()
-    for rec in records:
-        d1 = rec.get("drug1")
-        d2 = rec.get("drug2")
-        if d1:
-            names.add(d1.strip())
-        if d2:
-            names.add(d2.strip())
-    return sorted(names)
+WORD = re.compile(r"[a-z][a-z0-9-]*")
+MIN_FUZZY_LENGTH = 5  # shorter words are too ambiguous to correct
+VOCABULARY_SAMPLE_EDGES = 200_000  # descriptions are templated; a stride sample covers them
 
+# Everyday words of MIN_FUZZY_LENGTH+ letters seen in questions; never fuzzy-corrected
+COMMON_WORDS = frozenset("""
+    about above across actually added after afternoon again against ahead allergic
+    allowed almost alone along already alright although always among amount another
+    answer anyone anything anyway apart around asked avoid aware badly based because
+    become before began begin behind being below better between blood bottle brain
+    bring broke build called cannot careful cause caused causes change check child
+    children chronic close combine combined coming common condition could couple
+    daily danger dangerous days doctor doing double during early eating either
+    elderly else enough evening every everyday exactly extra family feeling fever
+    first follow following found friend further getting given giving going great
+    happen happens having headache health healthy heart heavy hello hours house
+    however infant instead issue issues kidney kidneys known large later least
+    leave level levels light likely little liver longer lower maybe meals means
+    medicine medicines might minutes month months morning mother night normal
+    nothing often other others people period person pills please pregnant
+    pressure probably problem problems question quick quite rather reaction
+    really reason right safely safer same second seems serious several should
+    since sleep small something sometimes start started still stomach stop
+    stopped stronger sugar taken takes taking tablet tablets thanks their them
+    themselves there these thing things think those though three through today
+    together tomorrow tonight total under until using usually water weeks weight
+    where whether which while whole whose woman women would wrong years young
+""".split())
 
-# Load once at import time
-ALL_DRUG_NAMES: List[str] = _load_drug_names(DATA_PATH)
+
+class DrugMention(NamedTuple):
+    name: str  # canonical graph name
+    drug_id: int
+    start: int
+    end: int
+    surface: str  # text as written in the query
+    distance: int = 0  # edit distance for fuzzy matches
+
+
+def _name_patterns(names: List[str]) -> Dict[str, int]:
+    """Lowercased surface form -> graph drug id (names first, then synonym groups)"""
+    patterns = {}
+    for drug_id, name in enumerate(names):
+        patterns.setdefault(name.strip().lower(), drug_id)
+
+    for drug, synonyms in DRUG_SYNONYMS.items():
+        # A synonym group resolves to whichever of its members is in the graph
+        group = [drug] + synonyms
+        drug_id = next((patterns[s.lower()] for s in group if s.lower() in patterns), None)
+        if drug_id is None:
+            continue
+        for surface in group:
+            patterns.setdefault(surface.lower(), drug_id)
+    patterns.pop("", None)
+    return patterns
+
+
+def _signature(names: List[str]) -> str:
+    digest = hashlib.sha1()
+    for name in names:
+        digest.update(name.encode("utf-8") + b"\0")
+    for drug, synonyms in sorted(DRUG_SYNONYMS.items()):
+        digest.update(f"{drug}:{','.join(synonyms)}\0".encode("utf-8"))
+    digest.update(" ".join(sorted(COMMON_WORDS)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _description_vocabulary(graph, patterns: Dict[str, int]) -> frozenset:
+    """Words of the interaction descriptions that are not drug names themselves"""
+    stride = max(1, graph.num_edges // VOCABULARY_SAMPLE_EDGES)
+    words = set()
+    for edge in range(0, graph.num_edges, stride):
+        words.update(WORD.findall(graph.edge_text(edge).lower()))
+    return frozenset(w for w in words if len(w) >= MIN_FUZZY_LENGTH and w not in patterns)
+
+
+def build_name_indexes(graph, path: str = AUTOMATON_PATH) -> Dict:
+    names = graph.names
+    patterns = _name_patterns(names)
+    indexes = {
+        "signature": _signature(names),
+        "automaton": AhoCorasick(patterns.items()),
+        "fuzzy": SymSpellIndex(patterns.items()),
+        "vocabulary": COMMON_WORDS.union(_description_vocabulary(graph, patterns)),
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(indexes, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote drug name indexes {path} ({len(patterns)} surface forms, "
+                f"{len(indexes['vocabulary'])} protected words)")
+    return indexes
+
+
+@lru_cache(maxsize=1)
+def get_name_indexes() -> Dict:
+    """Load the pickled automaton + fuzzy index on first use (rebuilt if stale or missing)"""
+    graph = get_graph()
+    if os.path.exists(AUTOMATON_PATH):
+        with open(AUTOMATON_PATH, "rb") as f:
+            stored = pickle.load(f)
+        if stored.get("signature") == _signature(graph.names) and "vocabulary" in stored:
+            return stored
+        logger.info("Drug name indexes are stale, rebuilding...")
+    return build_name_indexes(graph)
+
+
+def get_name_automaton() -> AhoCorasick:
+    return get_name_indexes()["automaton"]
+
+
+def _fuzzy_mentions(query: str, q_low: str, exact: List[DrugMention]) -> List[DrugMention]:
+    """Misspelled drug names among the words not covered by an exact match"""
+    names = get_graph().names
+    indexes = get_name_indexes()
+    fuzzy: SymSpellIndex = indexes["fuzzy"]
+    vocabulary = indexes["vocabulary"]
+    covered = [(m.start, m.end) for m in exact]
+    mentions = []
+    for word in WORD.finditer(q_low):
+        start, end = word.span()
+        if end - start < MIN_FUZZY_LENGTH or any(s < end and start < e for s, e in covered):
+            continue
+        if word.group() in vocabulary:
+            continue  # a real English / interaction-text word, not a misspelled drug
+        hit = fuzzy.lookup(word.group())
+        if hit is not None:
+            _, drug_id, distance = hit
+            mentions.append(DrugMention(names[drug_id], drug_id, start, end, query[start:end], distance))
+    return mentions
+
+
+def find_drug_mentions(query: str, fuzzy: bool = True) -> List[DrugMention]:
+    """
+    Every drug mentioned in the query, in order of appearance, one pass over
+    the text. Fuzzy matching only runs when fewer than two drugs were found.
+    """
+    names = get_graph().names
+    q_low = query.lower()
+    mentions = [
+        DrugMention(names[drug_id], drug_id, start, end, query[start:end])
+        for start, end, _, drug_id in get_name_automaton().find_longest(q_low)
+    ]
+    if fuzzy and len({m.drug_id for m in mentions}) < 2:
+        mentions = sorted(mentions + _fuzzy_mentions(query, q_low, mentions), key=lambda m: m.start)
+    return mentions
+
+
+def extract_drugs_from_query(query: str) -> List[str]:
+    """Distinct canonical drug names in order of first mention"""
+    return list(dict.fromkeys(m.name for m in find_drug_mentions(query)))
 
 
 def extract_drug_pair_from_query(query: str) -> Tuple[Optional[str], Optional[str]]:
     """
-    Try to find two drug names from our known list inside the query string.
+    Find two drug names from our known list inside the query string.
 
     Returns:
         (drug_a, drug_b) or (None, None) if we can't find two names.
     """
-    q_low = query.lower()
-    found: List[str] = []
-
-    for name in ALL_DRUG_NAMES:
-        # simple substring check; you can replace with tokenizer-based matching later
-        if name.lower() in q_low:
-            found.append(name)
-        if len(found) == 2:
-            break
-
+    found = extract_drugs_from_query(query)
     if len(found) < 2:
         return None, None
 
-    return found[0], found[1]
\ No newline at end of file
+    return found[0], found[1]
@@ -0,0 +1,76 @@
+"""
+Encoder Output Cache
+Reuse T5 encoder hidden states for repeated prompts (popular drug pairs)
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import torch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EncoderOutputCache:
+    """
+    LRU cache of encoder last_hidden_state tensors keyed by a hash of the
+    tokenized prompt, bounded by total tensor memory (bytes).
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.encoder_ms_total = 0.0  # time spent encoding on misses
+
+    @staticmethod
+    def key(input_ids: torch.Tensor) -> str:
+        ids = input_ids.detach().cpu().numpy()
+        return hashlib.blake2b(ids.tobytes() + str(ids.shape).encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[torch.Tensor]:
+        with self._lock:
+            hidden = self._entries.get(key)
+            if hidden is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return hidden
+
+    def put(self, key: str, hidden: torch.Tensor, encoder_ms: float = 0.0):
+        size = hidden.numel() * hidden.element_size()
+        with self._lock:
+            self.encoder_ms_total += encoder_ms
+            if size > self.max_bytes or key in self._entries:
+                return
+            self._entries[key] = hidden
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.numel() * evicted.element_size()
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_encoder_ms = self.encoder_ms_total / self.misses if self.misses else 0.0
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "avg_encoder_ms": round(avg_encoder_ms, 2),
+                "estimated_encoder_ms_saved": round(avg_encoder_ms * self.hits, 1),
+            }
@@ -45,11 +45,13 @@ class EnhancedRAGSystem(GroundedRAGSystem):
                 self.reranker
             )
             
-            # Initialize uncertainty quantifier
-            self.uncertainty_quantifier = UncertaintyQuantifier(self.generation_agent)
+            # Initialize uncertainty quantifier (samples share one generate() call)
+            self.uncertainty_quantifier = UncertaintyQuantifier(self.generator)
             
-            # Initialize grounding verifier
-            self.grounding_verifier = GroundingVerifier()
+            # Initialize grounding verifier (evidence embeddings precomputed, memory-mapped)
+            self.grounding_verifier = GroundingVerifier(
+                self.uncertainty_quantifier.embedding_model, processor=self.processor
+            )
             
             # Initialize confidence scorer
             self.confidence_scorer = ConfidenceScorer()
@@ -89,9 +91,9 @@ class EnhancedRAGSystem(GroundedRAGSystem):
         logger.info(f"Processing Enhanced Query: {query[:50]}...")
         logger.info("=" * 70)
         
-        # Step 1: Query Decomposition
+        # Step 1: Query Decomposition (none in local mode)
         logger.info("\n[1/6] Query Decomposition")
-        sub_queries = await self.query_agent.decompose(query)
+        sub_queries = [query]
         logger.info(f"  Generated {len(sub_queries)} sub-queries")
         
         # Step 2: Retrieval
@@ -109,9 +111,9 @@ class EnhancedRAGSystem(GroundedRAGSystem):
                     query, query_drugs, top_k=10
                 )
             else:
-                retrieved_docs = await self.retrieval_agent.retrieve(sub_queries, top_k=3)
+                retrieved_docs = self.retriever.retrieve(query, top_k=3)
         else:
-            retrieved_docs = await self.retrieval_agent.retrieve(sub_queries, top_k=3)
+            retrieved_docs = self.retriever.retrieve(query, top_k=3)
         
         logger.info(f"  Retrieved {len(retrieved_docs)} documents")
         
@@ -139,7 +141,7 @@ class EnhancedRAGSystem(GroundedRAGSystem):
                 query, retrieved_docs, num_samples=3  # Reduced for speed
             )
         else:
-            result = await self.generation_agent.generate(query, retrieved_docs)
+            result = self.generator.generate(query, retrieved_docs)
         
         # Add metadata
         result['sub_queries'] = sub_queries
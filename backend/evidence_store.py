@@ -0,0 +1,109 @@
+"""
+Evidence Sentence Store
+Sentence embeddings of every chunk, computed at index time and memory-mapped
+
+Each chunk is split into sentences once; their normalized MiniLM
+embeddings are stored as one float16 matrix (.npy) with per-chunk
+offsets. At query time the matrix is opened with mmap_mode='r', so
+grounding checks read the retrieved chunks' rows straight from the page
+cache and never re-encode documents.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from data_processor_drugbank import fingerprint_chunks
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+MIN_SENTENCE_CHARS = 15
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if len(s.strip()) >= MIN_SENTENCE_CHARS]
+
+
+class EvidenceSentenceStore:
+    """Sentence embeddings aligned with chunk rows: rows offsets[i]:offsets[i+1] belong to chunk i"""
+
+    def __init__(self, embeddings: np.ndarray, offsets: np.ndarray, fingerprint: str = "",
+                 model_name: str = ""):
+        self.embeddings = embeddings
+        self.offsets = offsets
+        self.fingerprint = fingerprint
+        self.model_name = model_name
+
+    @staticmethod
+    def paths(prefix: str) -> Tuple[str, str, str]:
+        return prefix + "_embeddings.npy", prefix + "_offsets.npy", prefix + "_meta.json"
+
+    def for_rows(self, rows: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(sentence embeddings, owning chunk row per sentence) for the given chunks"""
+        blocks, owners = [], []
+        for row in rows:
+            start, end = self.offsets[row], self.offsets[row + 1]
+            blocks.append(self.embeddings[start:end])
+            owners.append(np.full(end - start, row, dtype=np.int64))
+        if not blocks:
+            return np.zeros((0, self.embeddings.shape[1]), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        return np.concatenate(blocks).astype(np.float32), np.concatenate(owners)
+
+    @classmethod
+    def build(cls, chunks: List[Dict], model, model_name: str, fingerprint: str = "",
+              batch_size: int = 256) -> "EvidenceSentenceStore":
+        sentences, counts = [], []
+        for chunk in chunks:
+            chunk_sentences = split_sentences(chunk.get("text", ""))
+            sentences.extend(chunk_sentences)
+            counts.append(len(chunk_sentences))
+
+        logger.info(f"Encoding {len(sentences)} evidence sentences from {len(chunks)} chunks...")
+        embeddings = model.encode(
+            sentences, batch_size=batch_size, normalize_embeddings=True,
+            convert_to_numpy=True, show_progress_bar=True,
+        ).astype(np.float16)
+
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(embeddings, offsets, fingerprint, model_name)
+
+    def save(self, prefix: str):
+        emb_path, off_path, meta_path = self.paths(prefix)
+        np.save(emb_path, self.embeddings)
+        np.save(off_path, self.offsets)
+        with open(meta_path, "w") as f:
+            json.dump({"fingerprint": self.fingerprint, "model": self.model_name,
+                       "num_sentences": int(self.offsets[-1])}, f)
+
+    @classmethod
+    def load(cls, prefix: str) -> "EvidenceSentenceStore":
+        emb_path, off_path, meta_path = cls.paths(prefix)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        embeddings = np.load(emb_path, mmap_mode="r")
+        return cls(embeddings, np.load(off_path), meta["fingerprint"], meta["model"])
+
+
+def load_or_build_evidence_store(processor, model, model_name: str = "all-MiniLM-L6-v2",
+                                 prefix: str = "evidence_sentences") -> EvidenceSentenceStore:
+    """Evidence embeddings stored next to the FAISS index, rebuilt when chunks or model change"""
+    path = os.path.join(processor.data_dir, prefix)
+    fingerprint = fingerprint_chunks(processor.chunks)
+
+    if all(os.path.exists(p) for p in EvidenceSentenceStore.paths(path)):
+        store = EvidenceSentenceStore.load(path)
+        if store.fingerprint == fingerprint and store.model_name == model_name:
+            logger.info(f"Memory-mapped evidence sentence embeddings from {path}")
+            return store
+        logger.info("Evidence sentence embeddings are stale, rebuilding...")
+
+    store = EvidenceSentenceStore.build(processor.chunks, model, model_name, fingerprint)
+    store.save(path)
+    return EvidenceSentenceStore.load(path)
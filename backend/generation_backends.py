@@ -0,0 +1,259 @@
+"""
+Generation Backends for FLAN-T5
+Selectable inference runtime behind the same LocalLLMAgent interface
+
+- torch: PyTorch fp32 (default, previous behaviour)
+- onnx:  encoder + decoder (with past-key-values) exported to ONNX,
+         dynamically quantized to int8 and run through ONNX Runtime
+         (optional dependencies: pip install -r requirements-onnx.txt)
+
+Decoding is either sampled (previous behaviour) or assisted: a small
+draft model proposes tokens and the main model verifies them in one
+forward pass, giving the same output as plain greedy decoding.
+"""
+
+import logging
+import os
+import time
+from typing import List, Optional
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from transformers.modeling_outputs import BaseModelOutput
+
+from encoder_cache import EncoderOutputCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_INPUT_LIMIT = 512  # FLAN-T5 context window (tokens)
+
+ONNX_FILES = ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx")
+
+
+class Seq2SeqBackend:
+    """
+    Common tokenize -> encode -> generate -> decode path shared by all runtimes.
+
+    When an EncoderOutputCache is attached, the encoder runs only for
+    prompts not seen before; on a hit the cached hidden states are handed
+    to generate() and only the decoder runs.
+
+    When `assistant` (a smaller backend with the same vocabulary) is set,
+    generate(..., assisted=True) uses it as the draft model.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str, encoder_cache: Optional[EncoderOutputCache] = None):
+        self.model_name = model_name
+        self.encoder_cache = encoder_cache
+        self.assistant: Optional["Seq2SeqBackend"] = None
+        self.tokenizer = None
+        self.model = None
+
+    @property
+    def has_draft_model(self) -> bool:
+        """True when generate(..., assisted=True) can run"""
+        return self.assistant is not None
+
+    def _encode(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> BaseModelOutput:
+        key = self.encoder_cache.key(input_ids)
+        hidden = self.encoder_cache.get(key)
+        if hidden is None:
+            start = time.perf_counter()
+            hidden = self.model.get_encoder()(
+                input_ids=input_ids, attention_mask=attention_mask
+            ).last_hidden_state
+            self.encoder_cache.put(key, hidden, (time.perf_counter() - start) * 1000)
+        return BaseModelOutput(last_hidden_state=hidden)
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        inputs = self.tokenizer(
+            prompt, return_tensors="pt", truncation=True, max_length=MODEL_INPUT_LIMIT
+        )
+        return self._generate(inputs, **kwargs)
+
+    def generate_from_ids(self, input_ids: List[int], **kwargs) -> str:
+        """Generate from an already assembled prompt (e.g. ContextPacker output)"""
+        ids = torch.tensor([input_ids[:MODEL_INPUT_LIMIT]], dtype=torch.long)
+        return self._generate({"input_ids": ids, "attention_mask": torch.ones_like(ids)}, **kwargs)
+
+    def generate_samples(self, prompt: str, num_samples: int, **kwargs) -> List[str]:
+        """
+        `num_samples` sampled answers from one generate() call: the encoder
+        runs once and its output is shared by all sequences.
+        """
+        inputs = self.tokenizer(
+            prompt, return_tensors="pt", truncation=True, max_length=MODEL_INPUT_LIMIT
+        )
+        kwargs.setdefault("do_sample", True)
+        generate_kwargs = self._decoding_kwargs(**kwargs)
+        generate_kwargs["num_return_sequences"] = num_samples
+        with torch.inference_mode():
+            if self.encoder_cache is not None:
+                generate_kwargs["encoder_outputs"] = self._encode(
+                    inputs["input_ids"], inputs["attention_mask"]
+                )
+            output_ids = self.model.generate(**inputs, **generate_kwargs)
+        return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+    def generate_batch(self, batch_ids: List[List[int]], **kwargs) -> List[str]:
+        """
+        Generate for many assembled prompts in one padded forward pass
+        (offline jobs). Bypasses the encoder cache; assisted decoding is
+        single-sequence only.
+        """
+        if kwargs.get("assisted"):
+            raise ValueError("Assisted decoding does not support batched generation")
+        inputs = self.tokenizer.pad(
+            {"input_ids": [ids[:MODEL_INPUT_LIMIT] for ids in batch_ids]}, return_tensors="pt"
+        )
+        generate_kwargs = self._decoding_kwargs(**kwargs)
+        with torch.inference_mode():
+            output_ids = self.model.generate(**inputs, **generate_kwargs)
+        return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+    def _generate(self, inputs, **kwargs) -> str:
+        generate_kwargs = self._decoding_kwargs(**kwargs)
+        with torch.inference_mode():
+            if self.encoder_cache is not None:
+                generate_kwargs["encoder_outputs"] = self._encode(
+                    inputs["input_ids"], inputs["attention_mask"]
+                )
+            output_ids = self.model.generate(**inputs, **generate_kwargs)
+
+        return self.tokenizer.decode(output_ids[0], skip_special_tokens=True)
+
+    def _decoding_kwargs(self, max_length: int = 300, do_sample: bool = False,
+                         temperature: float = 1.0, assisted: bool = False,
+                         max_new_tokens: Optional[int] = None, **generate_kwargs):
+        if assisted:
+            if self.assistant is None:
+                raise ValueError(f"Assisted decoding requested but {self.model_name} has no draft model")
+            # Draft proposes, main model verifies; greedy so output is deterministic
+            # and identical to unassisted greedy decoding. Stops early at EOS.
+            generate_kwargs.update(assistant_model=self.assistant.model, do_sample=False)
+        elif do_sample:
+            generate_kwargs.update(do_sample=True, temperature=temperature)
+
+        if max_new_tokens is not None:
+            generate_kwargs["max_new_tokens"] = max_new_tokens
+        else:
+            generate_kwargs["max_length"] = max_length
+        return generate_kwargs
+
+    def __call__(self, prompt: str, num_return_sequences: int = 1, **kwargs):
+        """transformers.pipeline-compatible call signature"""
+        if num_return_sequences > 1:
+            texts = self.generate_samples(prompt, num_return_sequences, **kwargs)
+            return [{"generated_text": text} for text in texts]
+        return [{"generated_text": self.generate(prompt, **kwargs)}]
+
+
+class TorchT5Backend(Seq2SeqBackend):
+    """PyTorch fp32 on CPU"""
+
+    name = "torch"
+
+    def __init__(self, model_name: str, encoder_cache: Optional[EncoderOutputCache] = None):
+        super().__init__(model_name, encoder_cache)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name).eval()
+
+
+class OnnxT5Backend(Seq2SeqBackend):
+    """
+    ONNX Runtime with dynamic int8 quantization.
+
+    The first start exports the model with Optimum and quantizes the three
+    graphs (encoder, first-step decoder, decoder-with-past); later starts
+    load the quantized graphs from `export_dir`.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name: str, encoder_cache: Optional[EncoderOutputCache] = None,
+                 export_dir: Optional[str] = None):
+        super().__init__(model_name, encoder_cache)
+
+        # Optional dependency: only needed when this backend is selected
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        export_dir = export_dir or os.path.join("data", "onnx", model_name.replace("/", "__"))
+        quantized_dir = export_dir + "-int8"
+
+        if not os.path.exists(os.path.join(quantized_dir, "config.json")):
+            self._export_and_quantize(model_name, export_dir, quantized_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(quantized_dir)
+        self.model = ORTModelForSeq2SeqLM.from_pretrained(
+            quantized_dir,
+            encoder_file_name="encoder_model_quantized.onnx",
+            decoder_file_name="decoder_model_quantized.onnx",
+            decoder_with_past_file_name="decoder_with_past_model_quantized.onnx",
+            use_cache=True,
+        )
+
+    @staticmethod
+    def _export_and_quantize(model_name: str, export_dir: str, quantized_dir: str):
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        logger.info(f"Exporting {model_name} to ONNX (with past-key-values)...")
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+        model.save_pretrained(export_dir)
+
+        # Dynamic quantization: int8 weights, activations quantized at runtime
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        for file_name in ONNX_FILES:
+            logger.info(f"Quantizing {file_name} to int8...")
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+            quantizer.quantize(save_dir=quantized_dir, quantization_config=qconfig)
+
+        model.config.save_pretrained(quantized_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(quantized_dir)
+        logger.info(f"✅ Quantized ONNX model saved to {quantized_dir}")
+
+
+def attach_draft_model(backend: Seq2SeqBackend, draft: Seq2SeqBackend) -> bool:
+    """
+    Use `draft` as the assistant for `backend`. Only supported between
+    PyTorch models; returns False (and leaves backend unchanged) otherwise.
+    """
+    if backend is draft:
+        return False
+    if not (isinstance(backend, TorchT5Backend) and isinstance(draft, TorchT5Backend)):
+        logger.warning(f"Assisted decoding needs torch backends; not attaching draft to {backend.model_name}")
+        return False
+    backend.assistant = draft
+    logger.info(f"Draft model {draft.model_name} attached to {backend.model_name}")
+    return True
+
+
+BACKENDS = {
+    TorchT5Backend.name: TorchT5Backend,
+    OnnxT5Backend.name: OnnxT5Backend,
+}
+
+
+def create_generation_backend(model_name: str, backend: Optional[str] = None,
+                              encoder_cache_mb: Optional[float] = None) -> Seq2SeqBackend:
+    """
+    Instantiate a backend by name (defaults to the LLM_BACKEND env var, then 'torch').
+
+    encoder_cache_mb bounds the encoder output cache (defaults to the
+    ENCODER_CACHE_MB env var, then 256); 0 disables it.
+    """
+    backend = backend or os.environ.get("LLM_BACKEND", "torch")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {list(BACKENDS)}")
+    if encoder_cache_mb is None:
+        encoder_cache_mb = float(os.environ.get("ENCODER_CACHE_MB", "256"))
+
+    encoder_cache = None
+    if encoder_cache_mb > 0:
+        encoder_cache = EncoderOutputCache(max_bytes=int(encoder_cache_mb * 1024 * 1024))
+
+    logger.info(f"Loading {model_name} with the '{backend}' backend...")
+    return BACKENDS[backend](model_name, encoder_cache=encoder_cache)
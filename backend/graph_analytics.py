@@ -0,0 +1,172 @@
+"""
+Drug Interaction Graph Analytics
+Approximate centrality, communities and degree rankings, computed in the background and cached
+
+Exact weighted betweenness is O(VE) and does not finish on the full
+DrugBank graph, and greedy modularity communities were recomputed on
+every call. Analytics are now computed once per graph version:
+
+- betweenness: k-source sampled approximation (nx.betweenness_centrality(k=...))
+- communities: Louvain (nx.community.louvain_communities)
+- degree rankings: straight from the CSR offsets
+
+Results are stored as JSON next to the graph snapshot together with the
+graph version they were computed for. They are computed only by
+scripts/compute_graph_analytics.py, in its own process: betweenness and
+Louvain are pure-Python networkx and would hold the GIL for the whole run
+inside the API server. While the script runs it keeps a `.computing`
+marker next to the JSON file, so the API can report the state and picks
+up the new file once it is written.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import networkx as nx
+import numpy as np
+
+from drug_graph import DrugInteractionGraph
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ANALYTICS_PATH = os.path.join("data", "graph_analytics.json")
+DEFAULT_SAMPLES = int(os.environ.get("GRAPH_ANALYTICS_SAMPLES", "256"))
+SEED = 42
+
+
+def graph_version(graph: DrugInteractionGraph) -> str:
+    """Content hash of the edge list (changes whenever the graph is rebuilt differently)"""
+    digest = hashlib.sha1()
+    digest.update(str(graph.num_nodes).encode("utf-8"))
+    for arr in (graph.edge_a, graph.edge_b, graph.severity):
+        digest.update(np.ascontiguousarray(arr).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def to_networkx(graph: DrugInteractionGraph) -> nx.Graph:
+    """Weighted nx.Graph over drug ids; weight = severity code + 1 (1-4)"""
+    g = nx.Graph()
+    g.add_nodes_from(range(graph.num_nodes))
+    g.add_weighted_edges_from(zip(
+        graph.edge_a.tolist(), graph.edge_b.tolist(), (graph.severity.astype(np.int64) + 1).tolist()
+    ))
+    return g
+
+
+def compute_graph_analytics(graph: DrugInteractionGraph, samples: int = DEFAULT_SAMPLES,
+                            top_n: int = 100) -> Dict:
+    start = time.time()
+    names = graph.names
+    degrees = graph.degrees()
+    g = to_networkx(graph)
+
+    top_degree = np.argsort(-degrees, kind="stable")[:top_n]
+
+    k = min(samples, graph.num_nodes) or None
+    logger.info(f"Approximate betweenness over {k} sampled sources ({graph.num_nodes} drugs)...")
+    betweenness = nx.betweenness_centrality(g, k=k, weight="weight", seed=SEED)
+    top_betweenness = sorted(betweenness.items(), key=lambda x: x[1], reverse=True)[:top_n]
+
+    logger.info("Louvain communities...")
+    communities = sorted(
+        nx.community.louvain_communities(g, weight="weight", seed=SEED), key=len, reverse=True
+    )
+
+    return {
+        "version": graph_version(graph),
+        "computed_at": time.time(),
+        "compute_seconds": round(time.time() - start, 2),
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+        "betweenness_samples": k,
+        "degree": [{"drug": names[i], "degree": int(degrees[i])} for i in top_degree],
+        "betweenness": [{"drug": names[i], "betweenness": float(score)} for i, score in top_betweenness],
+        "communities": [
+            {"id": cid, "size": len(members), "members": sorted(names[i] for i in members)}
+            for cid, members in enumerate(communities)
+        ],
+    }
+
+
+class GraphAnalyticsStore:
+    """JSON cache of the analytics, refreshed when the graph version changes"""
+
+    def __init__(self, path: str = ANALYTICS_PATH, samples: int = DEFAULT_SAMPLES):
+        self.path = path
+        self.marker_path = f"{path}.computing"
+        self.samples = samples
+        self._result: Optional[Dict] = None
+        self._mtime: Optional[float] = None
+        self._versions: Dict[int, str] = {}
+
+    def _load(self) -> Optional[Dict]:
+        # Re-read only when the script has replaced the file
+        if not os.path.exists(self.path):
+            return None
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._result = json.load(f)
+            self._mtime = mtime
+        return self._result
+
+    def _version(self, graph: DrugInteractionGraph) -> str:
+        # Hashing the edge arrays once per graph object keeps per-request checks cheap
+        if id(graph) not in self._versions:
+            self._versions[id(graph)] = graph_version(graph)
+        return self._versions[id(graph)]
+
+    def current(self, graph: DrugInteractionGraph) -> Optional[Dict]:
+        """Cached analytics for this graph version, or None when missing / stale"""
+        result = self._load()
+        if result is not None and result.get("version") == self._version(graph):
+            return result
+        return None
+
+    def status(self, graph: DrugInteractionGraph) -> str:
+        """ready / computing / stale / missing"""
+        if self.current(graph) is not None:
+            return "ready"
+        if self.is_computing():
+            return "computing"
+        return "stale" if self._result is not None else "missing"
+
+    def is_computing(self) -> bool:
+        """True while a compute_graph_analytics.py run holds the marker file"""
+        try:
+            with open(self.marker_path, "r", encoding="utf-8") as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return False
+        try:
+            os.kill(pid, 0)  # a killed run leaves its marker behind
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def refresh(self, graph: DrugInteractionGraph, force: bool = False) -> Dict:
+        """Recompute (blocking) unless fresh analytics already exist; run from the script"""
+        if not force:
+            result = self.current(graph)
+            if result is not None:
+                return result
+        with open(self.marker_path, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        try:
+            result = compute_graph_analytics(graph, samples=self.samples)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self.path)
+            self._result, self._mtime = result, os.path.getmtime(self.path)
+            logger.info(f"Graph analytics written to {self.path} ({result['compute_seconds']}s)")
+            return result
+        finally:
+            os.remove(self.marker_path)
@@ -0,0 +1,195 @@
+# graph_snapshot.py
+"""
+Memory-mapped binary snapshot of the drug interaction graph.
+
+Parsing data/drugbank_interactions.json(l) on every process start is slow
+and every uvicorn worker ends up with its own copy. The snapshot stores
+the CSR arrays of drug_graph.DrugInteractionGraph plus the drug-name table
+in one file that is opened with mmap: loading takes milliseconds and all
+workers share the same pages through the OS page cache.
+
+File layout:
+
+    MAGIC (8 bytes) | format version (uint32) | header length (uint32)
+    header (JSON): source signature, labels, array table
+    payload: numpy arrays, each 64-byte aligned
+    trailer: CRC32 of the payload (uint32)
+
+The snapshot is rebuilt from the source JSON/JSONL whenever the format
+version, the source file (size + mtime), the risk lexicon used to infer
+missing severities or the payload checksum does not match.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+from drug_graph import DrugInteractionGraph, default_graph_source
+from risk_lexicon import get_risk_matcher
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DDIGSNAP"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")
+
+SNAPSHOT_PATH = os.path.join("data", "drugbank_graph.snap")
+
+# Graph attributes stored as arrays (name -> dtype)
+ARRAY_FIELDS = {
+    "offsets": np.int64,
+    "neighbors": np.int32,
+    "edge_ids": np.int32,
+    "edge_a": np.int32,
+    "edge_b": np.int32,
+    "severity": np.uint8,
+    "label_ids": np.uint8,
+    "text_offsets": np.int64,
+    "doc_offsets": np.int64,
+    "text_blob": np.uint8,
+    "doc_blob": np.uint8,
+}
+
+
+class SnapshotError(ValueError):
+    """Snapshot is missing, corrupt or out of date"""
+
+
+def source_signature(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return {
+        "path": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        # Severities missing from the source are inferred with the risk lexicon
+        "severity_lexicon": get_risk_matcher().signature(),
+    }
+
+
+def _as_array(value, dtype) -> np.ndarray:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=np.uint8)
+    return np.ascontiguousarray(value, dtype=dtype)
+
+
+def write_snapshot(graph: DrugInteractionGraph, path: str = SNAPSHOT_PATH,
+                   source: Optional[Dict] = None):
+    """Write atomically (temp file + rename) so concurrent workers never see a partial file"""
+    names_blob, names_offsets = DrugInteractionGraph._pack_blob([n.encode("utf-8") for n in graph.names])
+    arrays = {name: _as_array(getattr(graph, name), dtype) for name, dtype in ARRAY_FIELDS.items()}
+    arrays["names_offsets"] = names_offsets
+    arrays["names_blob"] = np.frombuffer(names_blob, dtype=np.uint8)
+
+    table, position, checksum = {}, 0, 0
+    for name, arr in arrays.items():
+        position += -position % ALIGNMENT
+        table[name] = [arr.dtype.str, int(arr.size), position]
+        position += arr.nbytes
+
+    header = json.dumps({
+        "source": source,
+        "labels": graph.labels,
+        "arrays": table,
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+    }).encode("utf-8")
+
+    # Payload is checksummed as written (including alignment padding)
+    payload_start = PREAMBLE.size + len(header)
+    payload_start += -payload_start % ALIGNMENT
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b"\0" * (payload_start - f.tell()))
+        written = 0
+        for name, arr in arrays.items():
+            pad = b"\0" * (table[name][2] - written)
+            data = arr.tobytes()
+            for chunk in (pad, data):
+                f.write(chunk)
+                checksum = zlib.crc32(chunk, checksum)
+            written = table[name][2] + len(data)
+        # Checksum goes in a fixed-size trailer so the header can be written first
+        f.write(struct.pack("<I", checksum))
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote graph snapshot {path} ({graph.num_nodes} drugs, {graph.num_edges} interactions)")
+
+
+def load_snapshot(path: str = SNAPSHOT_PATH, expected_source: Optional[Dict] = None,
+                  verify: bool = True) -> DrugInteractionGraph:
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mm) < PREAMBLE.size:
+        raise SnapshotError(f"{path} is truncated")
+    magic, version, header_len = PREAMBLE.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a graph snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+
+    header = json.loads(mm[PREAMBLE.size:PREAMBLE.size + header_len].decode("utf-8"))
+    if expected_source is not None and header["source"] != expected_source:
+        raise SnapshotError(f"{path} was built from a different source file")
+
+    payload_start = PREAMBLE.size + header_len
+    payload_start += -payload_start % ALIGNMENT
+    payload_end = len(mm) - 4
+    if verify:
+        (stored,) = struct.unpack_from("<I", mm, payload_end)
+        if zlib.crc32(memoryview(mm)[payload_start:payload_end]) != stored:
+            raise SnapshotError(f"{path} failed checksum validation")
+
+    arrays = {
+        name: np.frombuffer(mm, dtype=np.dtype(dtype), count=count, offset=payload_start + offset)
+        if count else np.zeros(0, dtype=np.dtype(dtype))
+        for name, (dtype, count, offset) in header["arrays"].items()
+    }
+
+    names_blob = arrays.pop("names_blob").tobytes()
+    names_offsets = arrays.pop("names_offsets")
+    names = [
+        names_blob[names_offsets[i]:names_offsets[i + 1]].decode("utf-8")
+        for i in range(len(names_offsets) - 1)
+    ]
+    return DrugInteractionGraph(names=names, labels=header["labels"], **arrays)
+
+
+def load_or_build_graph(source: Optional[str] = None, snapshot_path: str = SNAPSHOT_PATH,
+                        verify: Optional[bool] = None) -> DrugInteractionGraph:
+    """Open the snapshot, rebuilding it from the source JSON/JSONL when it is missing or stale"""
+    source = source or default_graph_source()
+    signature = source_signature(source)
+    if verify is None:
+        verify = os.environ.get("GRAPH_SNAPSHOT_VERIFY", "true").lower() == "true"
+
+    try:
+        graph = load_snapshot(snapshot_path, expected_source=signature, verify=verify)
+        logger.info(f"Memory-mapped graph snapshot {snapshot_path}")
+        return graph
+    except FileNotFoundError:
+        logger.info(f"No graph snapshot at {snapshot_path}, building from {source}...")
+    except SnapshotError as e:
+        logger.info(f"{e}; rebuilding from {source}...")
+
+    write_snapshot(DrugInteractionGraph.from_json(source), snapshot_path, source=signature)
+    return load_snapshot(snapshot_path, expected_source=signature, verify=False)
+
+
+@lru_cache(maxsize=1)
+def get_graph() -> DrugInteractionGraph:
+    """Process-wide graph shared by the agent and the drug name extractor"""
+    return load_or_build_graph()
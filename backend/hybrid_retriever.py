@@ -0,0 +1,143 @@
+"""
+Hybrid Retriever - Sparse BM25 + Dense FAISS
+Exact drug and brand names are matched by BM25, paraphrases by MiniLM
+"""
+
+import logging
+import os
+from typing import List, Dict
+
+import numpy as np
+
+from bm25_index import SparseBM25Index, load_or_build_bm25_index
+from data_processor_drugbank import get_processor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FUSION_METHODS = ('rrf', 'weighted', 'dense', 'sparse')
+
+
+class HybridRetriever:
+    """
+    Fuse dense (FAISS) and sparse (BM25) candidate lists.
+
+    fusion='rrf'      reciprocal rank fusion: sum of 1 / (rrf_k + rank)
+    fusion='weighted' min-max normalized scores, dense_weight * dense + (1 - dense_weight) * sparse
+    fusion='dense'    FAISS only (previous behaviour)
+    fusion='sparse'   BM25 only
+
+    search_many() retrieves for several sub-queries at once: dense
+    candidates come from one batched encode + FAISS matrix search, RRF
+    sums over every (sub-query, retriever) list, and the score-based
+    methods keep each chunk's best score over the sub-queries.
+    """
+
+    def __init__(self, processor, sparse_index: SparseBM25Index,
+                 fusion: str = 'rrf', candidate_k: int = 50,
+                 rrf_k: int = 60, dense_weight: float = 0.5):
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method '{fusion}', expected one of {FUSION_METHODS}")
+        self.processor = processor
+        self.sparse_index = sparse_index
+        self.fusion = fusion
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+
+    def _dense_candidates(self, queries: List[str], k: int):
+        return [
+            (rows, 1.0 / (1.0 + distances))
+            for rows, distances in self.processor.search_batch_with_scores(queries, top_k=k)
+        ]
+
+    @staticmethod
+    def _min_max(scores: np.ndarray) -> np.ndarray:
+        if scores.size == 0:
+            return scores
+        spread = scores.max() - scores.min()
+        if spread <= 0:
+            return np.ones_like(scores)
+        return (scores - scores.min()) / spread
+
+    @staticmethod
+    def _best_scores(lists, normalize) -> Dict[int, float]:
+        """Max score per chunk over several (rows, scores) lists"""
+        best: Dict[int, float] = {}
+        for rows, scores in lists:
+            scores = normalize(scores) if normalize else scores
+            for row, score in zip(rows.tolist(), scores.tolist()):
+                if score > best.get(row, float('-inf')):
+                    best[row] = score
+        return best
+
+    @staticmethod
+    def _best_ranks(lists) -> Dict[int, int]:
+        ranks: Dict[int, int] = {}
+        for rows, _ in lists:
+            for rank, row in enumerate(rows.tolist(), 1):
+                ranks[row] = min(rank, ranks.get(row, rank))
+        return ranks
+
+    def _fuse(self, dense_lists, sparse_lists) -> Dict[int, float]:
+        fused: Dict[int, float] = {}
+
+        if self.fusion == 'rrf':
+            for rows, _ in dense_lists + sparse_lists:
+                for rank, row in enumerate(rows.tolist(), 1):
+                    fused[row] = fused.get(row, 0.0) + 1.0 / (self.rrf_k + rank)
+        else:
+            weight = self.dense_weight
+            for row, score in self._best_scores(dense_lists, self._min_max).items():
+                fused[row] = fused.get(row, 0.0) + weight * score
+            for row, score in self._best_scores(sparse_lists, self._min_max).items():
+                fused[row] = fused.get(row, 0.0) + (1.0 - weight) * score
+
+        return fused
+
+    def search(self, query: str, top_k: int = 4) -> List[Dict]:
+        """Return the top_k fused chunks (copies, with chunk_row and relevance_score)"""
+        return self.search_many([query], top_k=top_k)
+
+    def search_many(self, queries: List[str], top_k: int = 4) -> List[Dict]:
+        """Top_k chunks fused over all sub-queries of one request"""
+        k = max(top_k, self.candidate_k)
+
+        if self.fusion == 'sparse':
+            dense_lists = []
+        else:
+            dense_lists = self._dense_candidates(queries, top_k if self.fusion == 'dense' else k)
+
+        if self.fusion == 'dense':
+            sparse_lists = []
+        else:
+            sparse_lists = [self.sparse_index.search(query, top_k=k) for query in queries]
+
+        if self.fusion in ('dense', 'sparse'):
+            best = self._best_scores(dense_lists or sparse_lists, None)
+            ranked = sorted(best.items(), key=lambda x: x[1], reverse=True)
+        else:
+            fused = self._fuse(dense_lists, sparse_lists)
+            ranked = sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+        dense_rank = self._best_ranks(dense_lists)
+        sparse_rank = self._best_ranks(sparse_lists)
+
+        results = []
+        for row, score in ranked[:top_k]:
+            doc = dict(self.processor.chunks[row], chunk_row=int(row))
+            doc['relevance_score'] = float(score)
+            doc['dense_rank'] = dense_rank.get(row)
+            doc['sparse_rank'] = sparse_rank.get(row)
+            results.append(doc)
+
+        return results
+
+
+def create_hybrid_retriever(processor=None) -> HybridRetriever:
+    """Build the serving retriever (fusion method configurable via RETRIEVAL_FUSION)"""
+    processor = processor or get_processor()
+    sparse_index = load_or_build_bm25_index(processor)
+    fusion = os.environ.get('RETRIEVAL_FUSION', 'rrf')
+    logger.info(f"Hybrid retriever ready (fusion={fusion})")
+    return HybridRetriever(processor, sparse_index, fusion=fusion)
@@ -0,0 +1,224 @@
+"""
+CPU Inference Worker Pool
+Run FLAN-T5 generation in pinned worker processes with fixed thread budgets
+
+With default settings every request's torch call spreads over all cores,
+so a few concurrent requests oversubscribe the host and throughput
+collapses. The pool splits the host into `workers` processes, each pinned
+to its own `threads` cores with torch intra-op threads (and OpenMP/MKL,
+tokenizer parallelism) set to match.
+
+Configuration (env):
+    INFERENCE_WORKERS  number of worker processes (0 = generate in-process)
+    INFERENCE_THREADS  torch threads per worker (default: cores // workers);
+                       with INFERENCE_WORKERS=0 it caps in-process threads
+
+Use scripts/sweep_inference_pool.py to find the best workers × threads
+split for a host.
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from generation_backends import (
+    MODEL_INPUT_LIMIT,
+    Seq2SeqBackend,
+    attach_draft_model,
+    create_generation_backend,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> List[int]:
+    """Cores this process may run on (respects cgroup / taskset limits)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_core_sets(workers: int, threads: int, cores: Optional[List[int]] = None) -> List[List[int]]:
+    """Split cores into `workers` disjoint sets of `threads` (wraps if the host is too small)"""
+    cores = cores or available_cores()
+    if workers * threads > len(cores):
+        logger.warning(f"{workers} workers x {threads} threads oversubscribes {len(cores)} cores")
+    return [
+        [cores[(w * threads + t) % len(cores)] for t in range(threads)]
+        for w in range(workers)
+    ]
+
+
+def configure_threads(threads: int):
+    """Set torch / OpenMP / tokenizer threading for the current process"""
+    import torch
+
+    # Fast tokenizers spawn their own rayon pool; keep it off in workers
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only settable before the first parallel op in this process
+        pass
+
+
+# ---------- Worker process side ----------
+
+_worker_backends: Dict[Tuple[str, Optional[str]], Seq2SeqBackend] = {}
+
+
+def _init_worker(core_sets, threads: int):
+    # Each worker claims the next free core set; a worker respawned after a
+    # crash finds the queue empty and runs unpinned
+    try:
+        cores = core_sets.get_nowait()
+    except queue.Empty:
+        cores = None
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    configure_threads(threads)
+    logger.info(f"Inference worker {os.getpid()} pinned to cores {cores or 'none'} ({threads} threads)")
+
+
+def _worker_backend(model_name: str, backend: Optional[str]) -> Seq2SeqBackend:
+    key = (model_name, backend)
+    if key not in _worker_backends:
+        _worker_backends[key] = create_generation_backend(model_name, backend)
+    return _worker_backends[key]
+
+
+def _worker_sample(model_name: str, backend: Optional[str], prompt: str,
+                   num_samples: int, kwargs: Dict) -> List[str]:
+    return _worker_backend(model_name, backend).generate_samples(prompt, num_samples, **kwargs)
+
+
+def _worker_generate(model_name: str, backend: Optional[str], input_ids: List[int],
+                     draft_model_name: Optional[str], kwargs: Dict) -> str:
+    generator = _worker_backend(model_name, backend)
+    if kwargs.get("assisted") and generator.assistant is None:
+        if not (draft_model_name and attach_draft_model(generator, _worker_backend(draft_model_name, "torch"))):
+            # Plain greedy decoding gives the same output, just without the draft speed-up
+            logger.warning(f"No draft model for {model_name}; decoding greedily without assistance")
+            kwargs = {**kwargs, "assisted": False}
+    return generator.generate_from_ids(input_ids, **kwargs)
+
+
+# ---------- Parent process side ----------
+
+class PooledBackend(Seq2SeqBackend):
+    """
+    Seq2SeqBackend proxy whose generation runs in the pool. Only the
+    tokenizer lives in the calling process; models (and their encoder
+    caches) are loaded lazily inside each worker.
+    """
+
+    name = "pooled"
+
+    def __init__(self, pool: "InferencePool", model_name: str):
+        super().__init__(model_name)
+        from transformers import AutoTokenizer
+
+        self.pool = pool
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.draft_model_name: Optional[str] = None
+
+    @property
+    def has_draft_model(self) -> bool:
+        # The draft itself is loaded inside the workers
+        return self.draft_model_name is not None
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        input_ids = self.tokenizer(prompt, truncation=True, max_length=MODEL_INPUT_LIMIT)["input_ids"]
+        return self.generate_from_ids(input_ids, **kwargs)
+
+    def generate_from_ids(self, input_ids: List[int], **kwargs) -> str:
+        return self.pool.submit(self.model_name, list(input_ids), self.draft_model_name, **kwargs).result()
+
+    def generate_samples(self, prompt: str, num_samples: int, **kwargs) -> List[str]:
+        return self.pool.sample(self.model_name, prompt, num_samples, **kwargs).result()
+
+    def generate_batch(self, batch_ids: List[List[int]], **kwargs) -> List[str]:
+        # Spread the batch over the workers instead of padding it together
+        futures = [
+            self.pool.submit(self.model_name, list(ids), self.draft_model_name, **kwargs)
+            for ids in batch_ids
+        ]
+        return [f.result() for f in futures]
+
+
+class InferencePool:
+    """workers × threads process pool for generation"""
+
+    def __init__(self, workers: int, threads: int, backend: Optional[str] = None):
+        self.workers = workers
+        self.threads = threads
+        self.backend = backend or os.environ.get("LLM_BACKEND", "torch")
+        self.core_sets = plan_core_sets(workers, threads)
+
+        # spawn (not fork): torch thread pools and tokenizers are not fork-safe
+        ctx = mp.get_context("spawn")
+        core_queue = ctx.Queue()
+        for cores in self.core_sets:
+            core_queue.put(cores)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(core_queue, threads),
+        )
+        logger.info(f"Inference pool started: {workers} workers x {threads} threads")
+
+    def submit(self, model_name: str, input_ids: List[int],
+               draft_model_name: Optional[str] = None, **kwargs) -> Future:
+        return self._executor.submit(
+            _worker_generate, model_name, self.backend, input_ids, draft_model_name, kwargs
+        )
+
+    def sample(self, model_name: str, prompt: str, num_samples: int, **kwargs) -> Future:
+        return self._executor.submit(
+            _worker_sample, model_name, self.backend, prompt, num_samples, kwargs
+        )
+
+    def backend_for(self, model_name: str) -> PooledBackend:
+        return PooledBackend(self, model_name)
+
+    def describe(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads,
+            "backend": self.backend,
+            "core_sets": self.core_sets,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def create_inference_pool(workers: Optional[int] = None,
+                          threads: Optional[int] = None) -> Optional[InferencePool]:
+    """
+    Pool from INFERENCE_WORKERS / INFERENCE_THREADS. Returns None when
+    generation should stay in-process; the thread cap is then applied to
+    the current process instead.
+    """
+    if workers is None:
+        workers = int(os.environ.get("INFERENCE_WORKERS", "0"))
+    if threads is None and os.environ.get("INFERENCE_THREADS"):
+        threads = int(os.environ["INFERENCE_THREADS"])
+
+    if workers <= 0:
+        if threads:
+            configure_threads(threads)
+            logger.info(f"In-process generation capped at {threads} torch threads")
+        return None
+
+    threads = threads or max(1, len(available_cores()) // workers)
+    return InferencePool(workers, threads)
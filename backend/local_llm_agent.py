@@ -254,21 +254,39 @@
 # local_llm_agent.py
 
 import logging
+import os
 import torch
 import asyncio
-from transformers import pipeline, AutoTokenizer
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from sentence_transformers import SentenceTransformer, util
 
 from data_processor_drugbank import get_processor
-from drug_knowledge import expand_drug_query
+from drug_knowledge import expand_drug_subqueries
+from context_packer import ContextPacker, load_or_build_chunk_tokens
+from generation_backends import (
+    attach_draft_model,
+    create_generation_backend,
+    MODEL_INPUT_LIMIT,
+)
+from hybrid_retriever import create_hybrid_retriever
+from inference_pool import create_inference_pool
+from model_router import ModelRouter, TIER_MODELS
+from query_pipeline import Stage, StagePipeline
+from severity_scores import load_or_build_severity_scores
+from uncertainty_hallucination import GroundingVerifier
 
 # NEW IMPORTS
-from drug_graph import DrugInteractionGraph
-from drug_name_extractor import extract_drug_pair_from_query
+from graph_snapshot import get_graph
+from drug_name_extractor import extract_drug_pair_from_query, find_drug_mentions
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pairs grow quadratically with the list; /api/regimen/check rejects longer lists
+MAX_REGIMEN_DRUGS = int(os.environ.get("MAX_REGIMEN_DRUGS", "30"))
+
 
 # Small ontology for backup (when graph can't help)
 ONTOLOGY_CONCEPTS = [
@@ -320,6 +338,9 @@ class LocalLLMAgent:
         # 1. Initialize retrieval system (FAISS + DrugBank processor)
         self.processor = get_processor()
 
+        # 1b. Hybrid retriever: BM25 (exact drug / brand names) fused with FAISS
+        self.retriever = create_hybrid_retriever(self.processor)
+
         # 2. Initialize scoring model (SentenceTransformers on CPU)
         logger.info("Loading scoring model (all-MiniLM-L6-v2) on CPU...")
         self.scoring_model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
@@ -329,117 +350,250 @@ class LocalLLMAgent:
         self.ontology_concepts = ONTOLOGY_CONCEPTS
         self.ontology_texts = [c["term"] for c in self.ontology_concepts]
         self.ontology_embeddings = self.scoring_model.encode(
-            self.ontology_texts, convert_to_tensor=True
+            self.ontology_texts, normalize_embeddings=True, convert_to_numpy=True
+        )
+
+        # 2b'. Every chunk's similarity to those concepts, precomputed at index time
+        self.chunk_severity = load_or_build_severity_scores(
+            self.processor, self.scoring_model, self.ontology_concepts, self.ontology_embeddings
         )
 
         # 2c. Load the Drug Interaction Graph
         logger.info("Loading Drug Interaction Graph...")
-        # adjust path if your JSON is elsewhere
-        self.graph = DrugInteractionGraph.from_json("data/drugbank_interactions.json")
-
-        # 3. Initialize Generation Model (FLAN-T5 on CPU)
-        model_name = "google/flan-t5-large"
+        # memory-mapped snapshot, rebuilt from the JSON/JSONL source when stale
+        self.graph = get_graph()
+
+        # 3. Initialize Generation Models (FLAN-T5 on CPU, torch or ONNX int8 via LLM_BACKEND)
+        # Only flan-t5-large by default; LLM_TIERS=small,base,large opts into latency-budget routing
+        # With INFERENCE_WORKERS set, models run in a pool of core-pinned worker processes
+        tiers = [t.strip() for t in os.environ.get("LLM_TIERS", "large").split(",") if t.strip()]
+        self.router = ModelRouter(tiers)
+        self.inference_pool = create_inference_pool()
+        self.generators = {}
         try:
-            logger.info(f"Loading {model_name}...")
-            device = -1  # CPU
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.generator = pipeline(
-                "text2text-generation",
-                model=model_name,
-                tokenizer=self.tokenizer,
-                max_length=512,
-                device=device,
-            )
-            logger.info(f"✅ {model_name} loaded successfully")
+            for tier in self.router.tiers:
+                model_name = TIER_MODELS[tier]
+                if self.inference_pool is not None:
+                    self.generators[tier] = self.inference_pool.backend_for(model_name)
+                else:
+                    self.generators[tier] = create_generation_backend(model_name)
+                logger.info(f"✅ {model_name} loaded successfully ({self.generators[tier].name} backend)")
         except Exception as e:
             logger.error(f"Error loading FLAN-T5: {e}")
             raise
 
-    async def process_query(self, query: str):
+        # Largest tier is the default generator
+        self.generator = self.generators[self.router.tiers[-1]]
+        self.tokenizer = self.generator.tokenizer
+
+        # 3a. Decoding mode: "sampled" (default) or "assisted" (greedy with a
+        # flan-t5-small draft model; reuses the small tier when it is loaded)
+        self.decoding_mode = os.environ.get("DECODING_MODE", "sampled")
+        self.max_new_tokens = int(os.environ.get("MAX_NEW_TOKENS", "200"))
+        if self.decoding_mode == "assisted" and self.inference_pool is not None:
+            # Workers load the draft model next to each tier on first use (torch only)
+            if self.inference_pool.backend != "torch":
+                logger.warning(f"Assisted decoding needs torch backends, pool uses "
+                               f"{self.inference_pool.backend}; using sampled decoding")
+            else:
+                for generator in self.generators.values():
+                    if generator.model_name != TIER_MODELS["small"]:
+                        generator.draft_model_name = TIER_MODELS["small"]
+        elif self.decoding_mode == "assisted":
+            draft = self.generators.get("small") or create_generation_backend(
+                TIER_MODELS["small"], backend="torch", encoder_cache_mb=0
+            )
+            for generator in self.generators.values():
+                attach_draft_model(generator, draft)
+
+        # 3b. Token-aware prompt assembly from chunk ids precomputed at index time
+        self.context_packer = ContextPacker(
+            self.tokenizer,
+            load_or_build_chunk_tokens(self.processor, self.tokenizer),
+            max_tokens=MODEL_INPUT_LIMIT,
+        )
+
+        # 3c. Sentence-level grounding against evidence embeddings precomputed at index time
+        self.grounding_verifier = GroundingVerifier(self.scoring_model, processor=self.processor)
+
+        # 4. Stage pipeline: independent stages share a small thread pool
+        # (enough threads to keep every inference worker busy)
+        pool_workers = self.inference_pool.workers if self.inference_pool else 0
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("PIPELINE_WORKERS", str(max(4, 2 * pool_workers)))),
+            thread_name_prefix="query-stage",
+        )
+        self.pipeline = self._build_pipeline()
+
+        # 5. Template fast path (opt-in via FAST_PATH_ENABLED): skip FLAN-T5 when the graph
+        # has a definitive answer, optionally generating the richer explanation in the background
+        self.fast_path_enabled = os.environ.get("FAST_PATH_ENABLED", "false").lower() == "true"
+        self.fast_path_async_explanation = (
+            os.environ.get("FAST_PATH_ASYNC_EXPLANATION", "false").lower() == "true"
+        )
+
+    def _build_pipeline(self) -> StagePipeline:
         """
-        Process drug interaction query using:
-        - graph severity (preferred)
-        - ontology-based severity (fallback)
-        - local FLAN-T5 generation for natural language explanation
+        Query stages as a dependency graph:
+
+            extract ──► graph_edge ──► graph_risk
+            expand ──► retrieve ──► score
+            retrieve + graph_risk ──► generate   (gated on graph_edge)
+            score + generate ──► ontology_risk   (gated on graph_risk)
+
+        The graph stages only need the drug pair, so they run alongside
+        retrieval; generation needs the retrieved documents and the graph
+        result (for model routing), so it runs alongside scoring.
+        generate is skipped when the graph edge is definitive (template
+        fast path) and ontology_risk as soon as the graph has answered,
+        each without waiting for the stages they would otherwise need.
         """
-        logger.info(f"Processing query with local LLM: {query}")
+        return StagePipeline(
+            [
+                Stage("extract", self._stage_extract, deps=["query"]),
+                Stage("expand", self._stage_expand, deps=["query"]),
+                Stage("retrieve", self._stage_retrieve, deps=["expand"]),
+                Stage("score", self._stage_score, deps=["expand", "retrieve"]),
+                Stage("graph_edge", self._stage_graph_edge, deps=["extract"]),
+                Stage("graph_risk", self._stage_graph_risk, deps=["graph_edge"]),
+                Stage(
+                    "generate",
+                    self._stage_generate,
+                    deps=["query", "retrieve", "graph_risk", "latency_budget_ms"],
+                    gate=["graph_edge"],
+                    skip_if=lambda r: self._use_fast_path(r["graph_edge"]),
+                ),
+                Stage(
+                    "ontology_risk",
+                    self._stage_ontology_risk,
+                    deps=["score", "generate"],
+                    gate=["graph_risk"],
+                    skip_if=lambda r: r["graph_risk"] is not None,
+                ),
+            ],
+            executor=self.executor,
+        )
 
+    # ---------- Pipeline stages ----------
+
+    def _stage_extract(self, query):
+        # Try to detect two drug names from the query
+        drug_a, drug_b = extract_drug_pair_from_query(query)
+        logger.info(f"Extracted drugs from query: {drug_a}, {drug_b}")
+        return drug_a, drug_b
+
+    def _stage_expand(self, query):
+        # SMART expansion of query into sub-queries (original first)
+        sub_queries = expand_drug_subqueries(query)
+        logger.info(f"Expanded query: {sub_queries}")
+        return sub_queries
+
+    def _stage_retrieve(self, expand):
+        # Retrieve relevant documents (hybrid BM25 + FAISS, fused over sub-queries)
+        retrieved_docs = self.retriever.search_many(expand, top_k=4)
+        logger.info(f"Retrieved {len(retrieved_docs)} documents")
+
+        # Debug print (optional)
+        print("\n" + "=" * 80)
+        print("📋 RETRIEVED DOCUMENTS DEBUG INFO")
+        print("=" * 80)
+        for i, doc in enumerate(retrieved_docs, 1):
+            print(f"\n📄 DOCUMENT {i}:")
+            print(f"   ID:        {doc.get('id')}")
+            print(f"   Source:    {doc.get('source')}")
+            print(f"   Text:      {doc.get('text', '')[:300]}...")
+            print("-" * 50)
+        print("=" * 80 + "\n")
+
+        return retrieved_docs
+
+    def _stage_score(self, expand, retrieve):
+        # Semantic relevance scores for UI
         try:
-            # Step 0: try to detect two drug names from the query
-            drug_a, drug_b = extract_drug_pair_from_query(query)
-            logger.info(f"Extracted drugs from query: {drug_a}, {drug_b}")
-
-            # Step 1: SMART expansion of query
-            expanded_query = expand_drug_query(query)
-            logger.info(f"Expanded query: {expanded_query}")
-
-            # Step 2: Retrieve relevant documents from DrugBank FAISS index
-            retrieved_docs = self.processor.search(expanded_query, top_k=4)
-            logger.info(f"Retrieved {len(retrieved_docs)} documents")
-
-            # Debug print (optional)
-            print("\n" + "=" * 80)
-            print("📋 RETRIEVED DOCUMENTS DEBUG INFO")
-            print("=" * 80)
-            for i, doc in enumerate(retrieved_docs, 1):
-                print(f"\n📄 DOCUMENT {i}:")
-                print(f"   ID:        {doc.get('id')}")
-                print(f"   Source:    {doc.get('source')}")
-                print(f"   Text:      {doc.get('text', '')[:300]}...")
-                print("-" * 50)
-            print("=" * 80 + "\n")
-
-            # Step 3: Calculate semantic relevance scores for UI
-            try:
-                retrieved_docs = self._calculate_real_scores(expanded_query, retrieved_docs)
-            except Exception as e:
-                logger.warning(f"Scoring warning: {e}")
-
-            # Step 4: Build context for FLAN-T5
-            context_text = self._prepare_context(retrieved_docs)
-            prompt = self._construct_prompt(query, context_text)
-
-            # Step 5: Generate explanation
-            output = self.generator(
-                prompt,
-                max_length=300,
-                do_sample=True,
-                temperature=0.3,
-            )
-            generated_text = output[0]["generated_text"]
+            return self._calculate_real_scores(expand[0], retrieve)
+        except Exception as e:
+            logger.warning(f"Scoring warning: {e}")
+            return retrieve
 
-            # Step 6: Graph-based risk assessment (preferred)
-            if drug_a and drug_b:
-                risk_score = self._assess_risk_graph(drug_a, drug_b)
-                logger.info(f"Graph-based risk score: {risk_score}")
+    def _stage_generate(self, query, retrieve, graph_risk, latency_budget_ms):
+        # Pick a model tier, build context for FLAN-T5 and generate explanation
+        tier, reason = self.router.choose(
+            latency_budget_ms, graph_answered=graph_risk is not None
+        )
+        logger.info(f"Routing generation to '{tier}' tier ({reason})")
+
+        # Pack the best documents into the exact token budget (question always kept)
+        packed = self.context_packer.pack(query, retrieve)
+        generator = self.generators[tier]
+        decoding = "assisted" if self.decoding_mode == "assisted" and generator.has_draft_model else "sampled"
+        with self.router.track(tier):
+            if decoding == "assisted":
+                text = generator.generate_from_ids(
+                    packed["input_ids"],
+                    assisted=True,
+                    max_new_tokens=self.max_new_tokens,
+                )
             else:
-                logger.info("Could not extract two drugs, skipping graph risk.")
-                risk_score = None
+                text = generator.generate_from_ids(
+                    packed["input_ids"],
+                    max_length=300,
+                    do_sample=True,
+                    temperature=0.3,
+                )
+        return {
+            "text": text,
+            "tier": tier,
+            "routing_reason": reason,
+            "decoding": decoding,
+            "prompt_tokens": packed["num_tokens"],
+            "context_docs": len(packed["doc_rows"]),
+        }
+
+    def _stage_graph_edge(self, extract):
+        # Direct knowledge-graph lookup for the extracted pair
+        drug_a, drug_b = extract
+        if not (drug_a and drug_b):
+            logger.info("Could not extract two drugs, skipping graph risk.")
+            return None
+        edge = self.graph.get_interaction(drug_a, drug_b)
+        if not edge:
+            return None
+        return {"drug_a": drug_a, "drug_b": drug_b, "edge": edge}
 
-            # If graph couldn't decide, fall back to ontology severity
-            if risk_score is None:
-                risk_score = self._assess_risk_ontology(retrieved_docs, generated_text)
-                logger.info(f"Ontology-based fallback risk score: {risk_score}")
+    def _stage_graph_risk(self, graph_edge):
+        # Graph-based risk assessment (preferred)
+        if graph_edge is None:
+            return None
+        risk_score = self._assess_risk_graph(graph_edge["drug_a"], graph_edge["drug_b"])
+        logger.info(f"Graph-based risk score: {risk_score}")
+        return risk_score
 
-            # Step 7: Build citations / grounding score
-            response = self._format_response(query, generated_text, retrieved_docs)
-            citations = self._create_citations(retrieved_docs)
+    def _stage_ontology_risk(self, score, generate):
+        # Graph couldn't decide: fall back to ontology severity
+        risk_score = self._assess_risk_ontology(score, generate["text"])
+        logger.info(f"Ontology-based fallback risk score: {risk_score}")
+        return risk_score
 
-            grounding_score = 0.0
-            if citations:
-                scores = [c["relevance_score"] for c in citations]
-                grounding_score = sum(scores) / len(scores)
+    async def process_query(self, query: str, latency_budget_ms: Optional[float] = None):
+        """
+        Process drug interaction query using:
+        - graph severity (preferred)
+        - ontology-based severity (fallback)
+        - local FLAN-T5 generation for natural language explanation
 
-            return {
-                "query": query,
-                "response": response,
-                "risk_score": risk_score,
-                "citations": citations,
-                "grounding_score": grounding_score,
-                "sub_queries": [query],
-                "num_retrieved_docs": len(retrieved_docs),
-                "retrieved_docs": retrieved_docs,
-            }
+        Stages run through self.pipeline; per-stage timings are returned
+        under metadata["stage_timings_ms"]. latency_budget_ms steers which
+        FLAN-T5 tier answers (see ModelRouter).
+        """
+        logger.info(f"Processing query with local LLM: {query}")
+
+        try:
+            results, timings, skipped = await self.pipeline.run(
+                query=query, latency_budget_ms=latency_budget_ms
+            )
+            return self._assemble_response(
+                query, results, self._build_metadata(results, timings, skipped)
+            )
 
         except Exception as e:
             logger.error(f"CRITICAL ERROR: {e}")
@@ -452,8 +606,248 @@ class LocalLLMAgent:
                 "sub_queries": [],
                 "num_retrieved_docs": 0,
                 "retrieved_docs": [],
+                "metadata": {},
+            }
+
+    def _assemble_response(self, query, results, metadata):
+        retrieved_docs = results["score"]
+        generation = results["generate"]
+        risk_score = results["graph_risk"] or results["ontology_risk"]
+
+        # Build response, citations / grounding score
+        if generation is None:
+            # Template fast path: the graph edge is the answer
+            graph_edge = results["graph_edge"]
+            response = self._format_template_response(
+                query, graph_edge, risk_score, retrieved_docs
+            )
+            citations = self._create_citations(retrieved_docs, graph_edge=graph_edge)
+            scores = [c["relevance_score"] for c in citations]
+            grounding_score = sum(scores) / len(scores)
+        else:
+            response = self._format_response(query, generation["text"], retrieved_docs)
+            citations = self._create_citations(retrieved_docs)
+
+            # Check each generated sentence against the retrieved evidence
+            grounding = self.grounding_verifier.verify_response(generation["text"], retrieved_docs)
+            grounding_score = grounding["grounding_score"]
+            metadata["grounding"] = {
+                k: grounding[k]
+                for k in ("hallucination_rate", "num_claims", "supported_claims")
             }
 
+        return {
+            "query": query,
+            "response": response,
+            "risk_score": risk_score,
+            "citations": citations,
+            "grounding_score": grounding_score,
+            "sub_queries": results.get("expand") or [query],
+            "num_retrieved_docs": len(retrieved_docs),
+            "retrieved_docs": retrieved_docs,
+            "metadata": metadata,
+        }
+
+    # ---------- Offline batch answers ----------
+
+    def answer_versions(self):
+        """Versions a stored answer depends on (see answer_store.PrecomputedAnswerStore)"""
+        generator = self.generator
+        return {
+            "index_version": self.processor.fingerprint(),
+            "model_version": f"{generator.name}:{generator.model_name}:greedy",
+        }
+
+    def answer_batch(self, queries, batch_size: int = 16):
+        """
+        Full responses for many queries with batched generation (offline use).
+
+        Retrieval, scoring and graph stages run per query; every prompt that
+        needs FLAN-T5 is then generated with the largest tier, `batch_size`
+        prompts per padded forward pass, greedy so stored answers are
+        reproducible.
+        """
+        tier = self.router.tiers[-1]
+        prepared = []
+        for query in queries:
+            extract = self._stage_extract(query)
+            expand = self._stage_expand(query)
+            retrieve = self.retriever.search_many(expand, top_k=4)
+            graph_edge = self._stage_graph_edge(extract)
+            prepared.append({
+                "query": query,
+                "expand": expand,
+                "retrieve": retrieve,
+                "score": self._stage_score(expand, retrieve),
+                "graph_edge": graph_edge,
+                "graph_risk": self._stage_graph_risk(graph_edge),
+                "packed": None if self._use_fast_path(graph_edge)
+                else self.context_packer.pack(query, retrieve),
+            })
+
+        to_generate = [p for p in prepared if p["packed"] is not None]
+        for start in range(0, len(to_generate), batch_size):
+            batch = to_generate[start:start + batch_size]
+            texts = self.generator.generate_batch(
+                [p["packed"]["input_ids"] for p in batch],
+                max_new_tokens=self.max_new_tokens,
+            )
+            for p, text in zip(batch, texts):
+                p["generate"] = {
+                    "text": text,
+                    "tier": tier,
+                    "routing_reason": "precomputed",
+                    "decoding": "greedy",
+                    "prompt_tokens": p["packed"]["num_tokens"],
+                    "context_docs": len(p["packed"]["doc_rows"]),
+                }
+            logger.info(f"Generated {min(start + batch_size, len(to_generate))}/{len(to_generate)} answers")
+
+        responses = []
+        for p in prepared:
+            results = {
+                "expand": p["expand"],
+                "score": p["score"],
+                "graph_edge": p["graph_edge"],
+                "graph_risk": p["graph_risk"],
+                "generate": p.get("generate"),
+                "ontology_risk": None,
+            }
+            if results["graph_risk"] is None:
+                results["ontology_risk"] = self._assess_risk_ontology(p["score"], p["generate"]["text"])
+            metadata = self._build_metadata(results, {}, [])
+            metadata["explanation_pending"] = False
+            responses.append(self._assemble_response(p["query"], results, metadata))
+        return responses
+
+    def _build_metadata(self, results, timings, skipped):
+        metadata = {
+            "stage_timings_ms": timings,
+            "skipped_stages": skipped,
+            "risk_source": "graph" if results["graph_risk"] else "ontology",
+        }
+        generation = results["generate"]
+        if generation is None:
+            metadata["answer_source"] = "template"
+            metadata["explanation_pending"] = self.fast_path_async_explanation
+        else:
+            metadata.update(
+                answer_source="generated",
+                model_tier=generation["tier"],
+                model_name=TIER_MODELS[generation["tier"]],
+                routing_reason=generation["routing_reason"],
+                decoding=generation["decoding"],
+                prompt_tokens=generation["prompt_tokens"],
+                context_docs=generation["context_docs"],
+            )
+        return metadata
+
+    # ---------- Template fast path ----------
+
+    def _use_fast_path(self, graph_edge) -> bool:
+        """A graph edge is definitive when it has a real severity and interaction text"""
+        if not self.fast_path_enabled or graph_edge is None:
+            return False
+        edge = graph_edge["edge"]
+        return (
+            edge.get("severity_code", "S0") in ("S1", "S2", "S3")
+            and len((edge.get("text") or "").strip()) >= 10
+        )
+
+    async def generate_explanation(self, query: str, retrieved_docs, risk_score=None) -> str:
+        """
+        Richer FLAN-T5 explanation for a fast-path answer, produced off the
+        request path (the server attaches it to the stored record).
+        """
+        loop = asyncio.get_running_loop()
+        generation = await loop.run_in_executor(
+            self.executor,
+            lambda: self._stage_generate(query, retrieved_docs, risk_score, None),
+        )
+        return generation["text"]
+
+    # ---------- Polypharmacy (medication list) ----------
+
+    async def check_regimen(self, drugs, summarize: bool = True, max_summary_pairs: int = 8):
+        """
+        Every interacting pair in a medication list from one induced-subgraph
+        lookup, most severe first. At most one FLAN-T5 call summarizes the
+        whole regimen (instead of one /api/query run per pair).
+
+        Names resolve like query text: graph names, then synonyms / brand
+        names and misspellings through the drug name automaton.
+        """
+        if len(drugs) > MAX_REGIMEN_DRUGS:
+            raise ValueError(f"At most {MAX_REGIMEN_DRUGS} drugs per regimen")
+
+        resolved, unknown, resolved_as = {}, [], {}
+        for drug in drugs:
+            drug_id = self.graph.drug_id(drug.strip())
+            if drug_id is None:
+                mentions = find_drug_mentions(drug)
+                if mentions:
+                    drug_id = mentions[0].drug_id
+                    resolved_as[drug] = mentions[0].name
+            if drug_id is None:
+                unknown.append(drug)
+            else:
+                resolved.setdefault(drug_id, self.graph.names[drug_id])
+
+        edges = self.graph.induced_edge_ids(resolved)
+        edges = edges[np.argsort(-self.graph.severity[edges].astype(np.int64), kind="stable")]
+
+        interactions = []
+        for edge in edges.tolist():
+            data = self.graph.edge_data(edge)
+            interactions.append({
+                "drug_a": self.graph.names[self.graph.edge_a[edge]],
+                "drug_b": self.graph.names[self.graph.edge_b[edge]],
+                "risk_score": self._severity_code_to_label(data["severity_code"]),
+                "severity_code": data["severity_code"],
+                "severity_label": data["severity_label"],
+                "doc_id": data["doc_id"],
+                "text": data["text"],
+            })
+
+        summary, summary_pairs = None, 0
+        if summarize and interactions:
+            # Token-budgeted so the trailing "Summary:" cue is never truncated away
+            packed = self.context_packer.pack_items(
+                *self._construct_regimen_prompt(list(resolved.values()), interactions[:max_summary_pairs])
+            )
+            summary_pairs = packed["num_items"]
+            loop = asyncio.get_running_loop()
+            summary = await loop.run_in_executor(
+                self.executor,
+                lambda: self.generator.generate_from_ids(packed["input_ids"], max_new_tokens=self.max_new_tokens),
+            )
+
+        return {
+            "drugs": list(resolved.values()),
+            "resolved_as": resolved_as,
+            "unknown_drugs": unknown,
+            "num_pairs_checked": len(resolved) * (len(resolved) - 1) // 2,
+            "interactions": interactions,
+            "risk_score": interactions[0]["risk_score"] if interactions else "LOW",
+            "summary": summary,
+            "summary_pairs": summary_pairs,
+        }
+
+    @staticmethod
+    def _construct_regimen_prompt(drugs, interactions):
+        """(head, one line per pair, tail) for ContextPacker.pack_items"""
+        head = (
+            "Instruction: Summarize the most important interaction risks in this "
+            "medication list, based strictly on the interactions below.\n\n"
+            f"Medications: {', '.join(drugs)}\n\n"
+            "Interactions:"
+        )
+        lines = [
+            f"\n- {i['drug_a']} + {i['drug_b']} ({i['risk_score']}): {i['text'].strip()[:300]}"
+            for i in interactions
+        ]
+        return head, lines, "\n\nSummary:"
+
     # ---------- Graph + Ontology Risk Logic ----------
 
     def _severity_code_to_label(self, severity_code: str) -> str:
@@ -476,7 +870,8 @@ class LocalLLMAgent:
         drug_a and drug_b, we read its severity_code and convert it to
         HIGH / MODERATE / LOW.
 
-        If there is no edge, return None and let caller fall back.
+        If there is no edge, or the edge has no known severity (S0), return
+        None and let caller fall back.
         """
         edge = self.graph.get_interaction(drug_a, drug_b)
         if not edge:
@@ -488,24 +883,34 @@ class LocalLLMAgent:
             f"Graph edge found {drug_a} – {drug_b}: "
             f"severity_code={severity_code}, label={edge.get('severity_label')}"
         )
+        if severity_code == "S0":
+            return None
         return self._severity_code_to_label(severity_code)
 
     def _assess_risk_ontology(self, docs, ai_summary):
         """
         Backup: ontology-based risk assessment using S0–S3 concepts.
 
-        We embed the combined evidence text and match it against our
-        ontology definitions (S3 major, S2 moderate, etc.).
+        The retrieved chunks' concept scores come from the index-time array;
+        only the short generated summary is embedded. The summary counts as
+        one more piece of evidence in the average, then we take the best
+        ontology definition (S3 major, S2 moderate, etc.).
         """
         if not docs and not ai_summary:
             return "LOW"
 
-        combined_text = ai_summary + " " + " ".join(d.get("text", "") for d in docs)
-        doc_embedding = self.scoring_model.encode(
-            combined_text, convert_to_tensor=True
-        )
+        rows = [d["chunk_row"] for d in docs if d.get("chunk_row") is not None]
+        evidence = [self.chunk_severity.for_rows(rows)]
+        if ai_summary:
+            summary_embedding = self.scoring_model.encode(
+                [ai_summary], normalize_embeddings=True, convert_to_numpy=True
+            )
+            evidence.append(summary_embedding @ self.ontology_embeddings.T)
 
-        scores = util.cos_sim(doc_embedding, self.ontology_embeddings)[0]
+        evidence = np.concatenate(evidence)
+        if len(evidence) == 0:
+            return "LOW"
+        scores = evidence.mean(axis=0)
         top_idx = int(scores.argmax())
         top_score = float(scores[top_idx])
 
@@ -542,7 +947,8 @@ class LocalLLMAgent:
 
         return docs
 
-    def _prepare_context(self, docs):
+    @staticmethod
+    def _prepare_context(docs):
         parts = []
         for i, doc in enumerate(docs[:4]):
             text = doc.get("text", "").replace("\n", " ").strip()
@@ -553,7 +959,8 @@ class LocalLLMAgent:
             return "No detailed interaction records found."
         return "\n\n".join(parts)
 
-    def _construct_prompt(self, query, context):
+    @staticmethod
+    def _construct_prompt(query, context):
         return (
             "Instruction: Answer strictly based on the Context below. "
             "If the text says 'no interaction', explicitly state "
@@ -578,14 +985,44 @@ class LocalLLMAgent:
         parts.append("─" * 50 + "\n⚠️ NOTE: Generated locally by FLAN-T5.")
         return "".join(parts)
 
-    def _create_citations(self, docs):
+    @staticmethod
+    def _format_template_response(query, graph_edge, risk_score, docs):
+        edge = graph_edge["edge"]
+        parts = [
+            f"ANALYSIS FOR: {query}\n",
+            "─" * 50 + "\n\n",
+            f"⚡ KNOWN INTERACTION: {graph_edge['drug_a']} + {graph_edge['drug_b']}\n",
+            f"Severity: {risk_score} ({edge.get('severity_code')}"
+            f"{', ' + edge['severity_label'] if edge.get('severity_label') else ''})\n\n",
+            f"{edge.get('text', '').strip()}\n\n",
+        ]
+        valid_docs = [d for d in docs if len(d.get("text", "")) > 10]
+        if valid_docs:
+            top_doc = valid_docs[0]
+            score = top_doc.get("real_score", 0) * 100
+            parts.append("📄 TOP EVIDENCE:\n")
+            parts.append(f"• [Match: {score:.1f}%] {top_doc['text'][:150]}...\n\n")
+        parts.append("─" * 50 + "\n⚠️ NOTE: Answered from the DrugBank interaction graph.")
+        return "".join(parts)
+
+    def _create_citations(self, docs, graph_edge=None):
         citations = []
+        if graph_edge is not None:
+            citations.append(
+                {
+                    "id": 1,
+                    "drug_name": f"{graph_edge['drug_a']} + {graph_edge['drug_b']}",
+                    "source": f"DrugBank Interaction {graph_edge['edge'].get('doc_id') or 'Graph'}",
+                    "relevance_score": 1.0,
+                }
+            )
+        # Citation ids run on after the graph citation; document labels count documents only
         for i, doc in enumerate(docs[:5]):
             score = doc.get("real_score", 0.0)
             drug_name = doc.get("source", "Unknown")  # or doc.get("drug_name")
             citations.append(
                 {
-                    "id": i + 1,
+                    "id": len(citations) + 1,
                     "drug_name": drug_name,
                     "source": f"DrugBank Doc {i+1}",
                     "relevance_score": float(score),
@@ -0,0 +1,101 @@
+"""
+Latency-Budget Model Router
+Picks a FLAN-T5 size tier per request so p95 holds during traffic spikes
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ordered smallest -> largest
+TIER_MODELS = {
+    "small": "google/flan-t5-small",
+    "base": "google/flan-t5-base",
+    "large": "google/flan-t5-large",
+}
+
+# Starting CPU latency guesses (ms), replaced by observed EWMA as traffic comes in
+DEFAULT_LATENCY_MS = {"small": 300.0, "base": 900.0, "large": 3000.0}
+
+
+class ModelRouter:
+    """
+    Choose a tier from:
+    - the request's latency budget (None = no budget, use the largest allowed tier)
+    - current queue depth: requests already generating share the CPU, so a
+      tier's expected latency is scaled by (in_flight + 1)
+    - whether the graph already produced a risk: the summary then only
+      explains a known answer, so the largest tier is not used
+    """
+
+    def __init__(self, tiers: List[str], ewma_alpha: float = 0.2, window: int = 1000):
+        unknown = [t for t in tiers if t not in TIER_MODELS]
+        if unknown or not tiers:
+            raise ValueError(f"Unknown model tiers {unknown}, expected some of {list(TIER_MODELS)}")
+
+        self.tiers = [t for t in TIER_MODELS if t in tiers]
+        self.ewma_alpha = ewma_alpha
+        self.estimates_ms = {t: DEFAULT_LATENCY_MS[t] for t in self.tiers}
+        self.latencies = {t: deque(maxlen=window) for t in self.tiers}
+        self.counts = {t: 0 for t in self.tiers}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def choose(self, latency_budget_ms: Optional[float] = None,
+               graph_answered: bool = False) -> Tuple[str, str]:
+        """Return (tier, reason)"""
+        candidates = list(reversed(self.tiers))  # largest first
+        if graph_answered and len(candidates) > 1:
+            candidates = candidates[1:]
+
+        if latency_budget_ms is None:
+            return candidates[0], "graph_answered" if graph_answered else "no_budget"
+
+        queue_factor = self.in_flight + 1
+        for tier in candidates:
+            if self.estimates_ms[tier] * queue_factor <= latency_budget_ms:
+                return tier, f"fits_budget(queue={self.in_flight})"
+
+        return candidates[-1], f"over_budget(queue={self.in_flight})"
+
+    @contextmanager
+    def track(self, tier: str):
+        """Count the request as in flight and record its latency for the tier"""
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self.counts[tier] += 1
+                self.latencies[tier].append(elapsed)
+                self.estimates_ms[tier] = (
+                    (1 - self.ewma_alpha) * self.estimates_ms[tier] + self.ewma_alpha * elapsed
+                )
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            total = sum(self.counts.values())
+            tiers = {}
+            for tier in self.tiers:
+                window = list(self.latencies[tier])
+                tiers[tier] = {
+                    "model": TIER_MODELS[tier],
+                    "requests": self.counts[tier],
+                    "share": self.counts[tier] / total if total else 0.0,
+                    "estimated_latency_ms": round(self.estimates_ms[tier], 1),
+                    "latency_ms_p50": float(np.percentile(window, 50)) if window else None,
+                    "latency_ms_p95": float(np.percentile(window, 95)) if window else None,
+                }
+            return {"in_flight": self.in_flight, "tiers": tiers}
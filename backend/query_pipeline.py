@@ -0,0 +1,111 @@
+"""
+Stage Pipeline - small dependency graph of query-processing stages
+Independent stages run concurrently on a thread pool
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    One unit of work in a StagePipeline.
+
+    func receives the results of `deps` as keyword arguments. If `skip_if`
+    is given it is evaluated as soon as the `gate` stages finish (before the
+    remaining deps are awaited); a skipped stage yields None.
+    """
+
+    def __init__(self, name: str, func: Callable, deps: Iterable[str] = (),
+                 skip_if: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 gate: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.skip_if = skip_if
+        self.gate = list(gate)
+
+
+class StagePipeline:
+    """Run stages as soon as their dependencies are available"""
+
+    def __init__(self, stages: List[Stage], executor: Optional[ThreadPoolExecutor] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.executor = executor
+        self._check_graph()
+
+    def _check_graph(self):
+        """Reject unknown dependencies and cycles when the pipeline is built"""
+        visiting, done = set(), set()
+
+        def visit(name, inputs):
+            if name in done or name in inputs:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in pipeline at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps + self.stages[name].gate:
+                if dep in self.stages:
+                    visit(dep, inputs)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name, set())
+
+    async def run(self, **inputs) -> Tuple[Dict[str, Any], Dict[str, float], List[str]]:
+        """
+        Execute the pipeline.
+
+        Returns (results by stage name, wall-clock ms per stage, skipped stage names).
+        Any stage exception is propagated to the caller.
+        """
+        loop = asyncio.get_running_loop()
+        results: Dict[str, Any] = dict(inputs)
+        timings: Dict[str, float] = {}
+        skipped: List[str] = []
+        tasks: Dict[str, asyncio.Task] = {}
+
+        missing = {dep for s in self.stages.values() for dep in s.deps + s.gate
+                   if dep not in self.stages and dep not in inputs}
+        if missing:
+            raise ValueError(f"Pipeline inputs missing: {sorted(missing)}")
+
+        async def wait_for(names):
+            pending = [tasks[n] for n in names if n in tasks]
+            if pending:
+                await asyncio.gather(*pending)
+
+        async def execute(stage: Stage):
+            if stage.skip_if is not None:
+                await wait_for(stage.gate)
+                if stage.skip_if(results):
+                    skipped.append(stage.name)
+                    results[stage.name] = None
+                    return
+
+            await wait_for(stage.deps)
+            kwargs = {dep: results[dep] for dep in stage.deps}
+
+            start = time.perf_counter()
+            value = await loop.run_in_executor(self.executor, lambda: stage.func(**kwargs))
+            timings[stage.name] = round((time.perf_counter() - start) * 1000, 2)
+            results[stage.name] = value
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(execute(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return results, timings, skipped
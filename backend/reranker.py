@@ -1,10 +1,15 @@
 """
 Cross-Encoder Re-Ranker for Improved Retrieval
 Uses a more powerful model to re-score initial retrieval results
+
+Pairs are scored in length-sorted order so each predict() batch pads to
+similar lengths; batch_rerank flattens the pairs of all queries into one
+such pass and scatters the scores back per query.
 """
 
 import logging
-from typing import List, Dict
+import os
+from typing import List, Dict, Optional
 import numpy as np
 from sentence_transformers import CrossEncoder
 
@@ -15,7 +20,8 @@ logger = logging.getLogger(__name__)
 class DrugInteractionReRanker:
     """Re-rank retrieved documents using cross-encoder"""
     
-    def __init__(self, model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2'):
+    def __init__(self, model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2',
+                 batch_size: Optional[int] = None):
         """
         Initialize cross-encoder for re-ranking
         
@@ -24,8 +30,47 @@ class DrugInteractionReRanker:
         """
         logger.info(f"Loading cross-encoder: {model_name}")
         self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size or int(os.environ.get('RERANK_BATCH_SIZE', '32'))
         logger.info("Cross-encoder loaded successfully")
     
+    def score_pairs(self, pairs: List[List[str]]) -> np.ndarray:
+        """
+        Cross-encoder scores for (query, text) pairs, in input order.
+        
+        Pairs are sorted by length before predict() so every batch holds
+        similar lengths (little padding), then scattered back.
+        """
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        lengths = np.array([len(q) + len(t) for q, t in pairs])
+        order = np.argsort(lengths, kind='stable')
+        sorted_scores = self.model.predict(
+            [pairs[i] for i in order], batch_size=self.batch_size, show_progress_bar=False
+        )
+        scores = np.empty(len(pairs), dtype=np.float32)
+        scores[order] = np.asarray(sorted_scores, dtype=np.float32)
+        return scores
+    
+    @staticmethod
+    def _apply_scores(documents: List[Dict], scores: np.ndarray, top_k: int) -> List[Dict]:
+        # Normalize scores to 0-1 range
+        scores = (scores - scores.min()) / (scores.max() - scores.min() + 1e-8)
+        
+        # Update documents with new scores
+        reranked_docs = []
+        for doc, score in zip(documents, scores):
+            doc_copy = doc.copy()
+            doc_copy['original_score'] = doc.get('relevance_score', 0.0)
+            doc_copy['reranker_score'] = float(score)
+            doc_copy['relevance_score'] = float(score)  # Update main score
+            reranked_docs.append(doc_copy)
+        
+        # Sort by new scores
+        reranked_docs.sort(key=lambda x: x['reranker_score'], reverse=True)
+        
+        # Return top-k
+        return reranked_docs[:top_k]
+    
     def rerank(self, query: str, documents: List[Dict], top_k: int = None) -> List[Dict]:
         """
         Re-rank documents using cross-encoder
@@ -46,33 +91,9 @@ class DrugInteractionReRanker:
         
         logger.info(f"Re-ranking {len(documents)} documents for query: '{query[:50]}...'")
         
-        # Prepare (query, document) pairs
-        pairs = []
-        for doc in documents:
-            # Use the text field for scoring
-            doc_text = doc.get('text', '')
-            pairs.append([query, doc_text])
-        
-        # Score all pairs
-        scores = self.model.predict(pairs)
-        
-        # Normalize scores to 0-1 range
-        scores = (scores - scores.min()) / (scores.max() - scores.min() + 1e-8)
-        
-        # Update documents with new scores
-        reranked_docs = []
-        for doc, score in zip(documents, scores):
-            doc_copy = doc.copy()
-            doc_copy['original_score'] = doc.get('relevance_score', 0.0)
-            doc_copy['reranker_score'] = float(score)
-            doc_copy['relevance_score'] = float(score)  # Update main score
-            reranked_docs.append(doc_copy)
-        
-        # Sort by new scores
-        reranked_docs.sort(key=lambda x: x['reranker_score'], reverse=True)
-        
-        # Return top-k
-        result = reranked_docs[:top_k]
+        # Score all (query, document text) pairs
+        scores = self.score_pairs([[query, doc.get('text', '')] for doc in documents])
+        result = self._apply_scores(documents, scores, top_k)
         
         logger.info(f"Re-ranking complete. Score improvements:")
         for i, doc in enumerate(result[:3]):
@@ -84,12 +105,25 @@ class DrugInteractionReRanker:
         return result
     
     def batch_rerank(self, queries: List[str], documents_list: List[List[Dict]], top_k: int = 5) -> List[List[Dict]]:
-        """Re-rank multiple queries at once"""
+        """Re-rank multiple queries at once (one flattened, length-bucketed scoring pass)"""
+        
+        pairs = [
+            [query, doc.get('text', '')]
+            for query, documents in zip(queries, documents_list)
+            for doc in documents
+        ]
+        logger.info(f"Batch re-ranking {len(pairs)} pairs for {len(queries)} queries")
+        scores = self.score_pairs(pairs)
         
         results = []
-        for query, documents in zip(queries, documents_list):
-            reranked = self.rerank(query, documents, top_k)
-            results.append(reranked)
+        start = 0
+        for documents in documents_list[:len(queries)]:
+            end = start + len(documents)
+            if documents:
+                results.append(self._apply_scores(documents, scores[start:end], top_k))
+            else:
+                results.append(documents)
+            start = end
         
         return results
 
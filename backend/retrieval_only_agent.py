@@ -4,6 +4,8 @@ Uses only SentenceTransformer + FAISS for document retrieval
 """
 
 from data_processor_drugbank import get_processor
+from risk_lexicon import get_risk_matcher
+from chunk_risk_masks import load_or_build_risk_masks
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -18,6 +20,8 @@ class RetrievalOnlyAgent:
     
     def __init__(self):
         self.processor = get_processor()
+        self.risk_matcher = get_risk_matcher()
+        self.risk_masks = load_or_build_risk_masks(self.processor, self.risk_matcher)
         logger.info("RetrievalOnlyAgent initialized with SentenceTransformer")
     
     def process_query(self, query: str, top_k: int = 5):
@@ -62,37 +66,19 @@ class RetrievalOnlyAgent:
     def _assess_risk(self, docs, query):
         """Simple rule-based risk assessment from retrieved documents"""
         
-        # Keywords indicating high risk
-        high_risk_keywords = [
-            'bleeding', 'hemorrhage', 'contraindicated', 'severe', 'fatal',
-            'dangerous', 'toxic', 'overdose', 'emergency', 'critical'
-        ]
-        
-        # Keywords indicating moderate risk
-        moderate_risk_keywords = [
-            'caution', 'monitor', 'adjust', 'increase', 'decrease',
-            'may cause', 'potential', 'interaction', 'affect'
-        ]
-        
-        # Keywords indicating low risk
-        low_risk_keywords = [
-            'minor', 'unlikely', 'safe', 'no significant', 'well-tolerated'
-        ]
-        
-        # Combine all document text
-        all_text = ' '.join([doc['text'].lower() for doc in docs])
-        
-        # Count keyword occurrences
-        high_count = sum(keyword in all_text for keyword in high_risk_keywords)
-        moderate_count = sum(keyword in all_text for keyword in moderate_risk_keywords)
-        low_count = sum(keyword in all_text for keyword in low_risk_keywords)
+        # Weighted risk-term hits: precomputed per-chunk masks, text scan only for unindexed docs
+        rows = [doc.get('chunk_row') for doc in docs]
+        if all(row is not None for row in rows):
+            scores = self.risk_masks.score_rows(rows, 'retrieval')
+        else:
+            scores = self.risk_matcher.score('\n'.join(doc['text'] for doc in docs), 'retrieval')
         
         # Determine risk level
-        if high_count >= 2:
+        if scores['high'] >= 2:
             return 'HIGH'
-        elif moderate_count >= 2:
+        elif scores['moderate'] >= 2:
             return 'MODERATE'
-        elif low_count >= 1:
+        elif scores['low'] >= 1:
             return 'LOW'
         else:
             return 'MODERATE'  # Default
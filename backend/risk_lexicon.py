@@ -0,0 +1,165 @@
+"""
+Risk Term Matcher
+One compiled severity lexicon shared by every keyword-based risk assessor
+
+The retrieval-only agent, the generation agent and the interaction graph
+each had their own keyword lists checked with `any(word in text ...)`,
+one substring scan per keyword, with no word boundaries ("unsafe"
+matched "safe") and no negation ("no bleeding" counted as bleeding).
+
+The lexicon has one profile per assessor, mapping that assessor's own
+severity levels to weighted terms. The profiles keep the original
+keyword-to-level assignments, so each assessor's thresholds mean what
+they meant before. All terms are compiled once into a single Aho-Corasick
+automaton; scoring a text is one pass that returns the weighted hits per
+level of the requested profile. Terms match at the start of a word and
+may be inflected ("monitor" matches "monitoring", as the substring checks
+did). A term counts once if it occurs at least once without a preceding
+negation. Set RISK_LEXICON_PATH to a JSON file of the same shape to
+override one or more profiles.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from aho_corasick import AhoCorasick
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# profile -> the levels its assessor's thresholds read
+PROFILE_LEVELS = {
+    "retrieval": ("high", "moderate", "low"),  # RetrievalOnlyAgent._assess_risk
+    "generation": ("high", "moderate"),  # LocalGenerationAgent._calculate_risk
+    "graph": ("contraindicated", "major", "moderate"),  # DrugInteractionGraph._infer_severity
+}
+
+# profile -> level -> {term: weight}
+DEFAULT_LEXICON: Dict[str, Dict[str, Dict[str, float]]] = {
+    "retrieval": {
+        "high": {
+            "bleeding": 1.0, "hemorrhage": 1.0, "contraindicated": 1.0, "severe": 1.0,
+            "fatal": 1.0, "dangerous": 1.0, "toxic": 1.0, "overdose": 1.0,
+            "emergency": 1.0, "critical": 1.0,
+        },
+        "moderate": {
+            "caution": 1.0, "monitor": 1.0, "adjust": 1.0, "increase": 1.0, "decrease": 1.0,
+            "may cause": 1.0, "potential": 1.0, "interaction": 1.0, "affect": 1.0,
+        },
+        "low": {
+            "minor": 1.0, "unlikely": 1.0, "safe": 1.0, "no significant": 1.0,
+            "well-tolerated": 1.0,
+        },
+    },
+    "generation": {
+        "high": {"fatal": 1.0, "life-threatening": 1.0, "severe": 1.0, "contraindicated": 1.0},
+        "moderate": {"monitor": 1.0, "caution": 1.0, "adjust": 1.0, "increase risk": 1.0},
+    },
+    "graph": {
+        "contraindicated": {"contraindicated": 1.0, "fatal": 1.0, "life-threatening": 1.0, "severe": 1.0},
+        "major": {"major": 1.0, "serious": 1.0, "significant": 1.0},
+        "moderate": {"moderate": 1.0, "caution": 1.0, "monitor": 1.0},
+    },
+}
+
+NEGATION_CUES = {"no", "not", "without", "never", "none", "denies", "absence", "non"}
+NEGATION_WINDOW = 3  # words before a term, within the same clause
+CLAUSE_BREAK = re.compile(r"[.;:!?,()\n]")
+
+
+class RiskTermMatcher:
+    def __init__(self, lexicon: Dict[str, Dict[str, Dict[str, float]]]):
+        self.lexicon = lexicon
+        # Distinct terms across all profiles, in automaton pattern order
+        self.terms: List[str] = list(dict.fromkeys(
+            term.lower()
+            for levels in lexicon.values()
+            for terms in levels.values()
+            for term in terms
+        ))
+        # profile -> term -> (level, weight)
+        self._term_info = {
+            profile: {
+                term.lower(): (level, float(weight))
+                for level, terms in levels.items()
+                for term, weight in terms.items()
+            }
+            for profile, levels in lexicon.items()
+        }
+        self.automaton = AhoCorasick((term, term) for term in self.terms)
+
+    def signature(self) -> str:
+        """Precomputed per-chunk hits are stale when the lexicon changes"""
+        digest = hashlib.sha1()
+        for profile, info in sorted(self._term_info.items()):
+            for term, (level, weight) in info.items():
+                digest.update(f"{profile}\0{term}\0{level}\0{weight}\0".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def levels(self, profile: str) -> List[str]:
+        return list(self.lexicon[profile])
+
+    def term_info(self, profile: str) -> Dict[str, tuple]:
+        """term -> (level, weight) for one profile"""
+        return self._term_info[profile]
+
+    @staticmethod
+    def _negated(text: str, start: int) -> bool:
+        clause = CLAUSE_BREAK.split(text[max(0, start - 60):start])[-1]
+        return any(word in NEGATION_CUES for word in clause.split()[-NEGATION_WINDOW:])
+
+    def find(self, text: str) -> List[Dict]:
+        """Every term occurrence (overlaps included) with its negation flag"""
+        text = text.lower()
+        return [
+            {"term": term, "start": start, "negated": self._negated(text, start)}
+            for start, _, term, _ in self.automaton.iter_matches(text, prefix=True)
+        ]
+
+    def matched_terms(self, text: str) -> List[str]:
+        """Distinct terms present in `text`, ignoring negated mentions ("no bleeding")"""
+        return list(dict.fromkeys(m["term"] for m in self.find(text) if not m["negated"]))
+
+    def score(self, text: str, profile: str) -> Dict[str, float]:
+        """Weighted hits per level of `profile`; each distinct term counts once (its weight)"""
+        return self.score_terms(self.matched_terms(text), profile)
+
+    def score_terms(self, terms: List[str], profile: str) -> Dict[str, float]:
+        info = self._term_info[profile]
+        scores = {level: 0.0 for level in self.lexicon[profile]}
+        for term in terms:
+            if term in info:
+                level, weight = info[term]
+                scores[level] += weight
+        return scores
+
+
+def load_lexicon(path: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+    path = path or os.environ.get("RISK_LEXICON_PATH")
+    if not path:
+        return DEFAULT_LEXICON
+    with open(path, "r", encoding="utf-8") as f:
+        overrides = json.load(f)
+    for profile, levels in overrides.items():
+        if profile not in PROFILE_LEVELS:
+            raise ValueError(f"Unknown risk profile in {path}: {profile}")
+        unknown = set(levels) - set(PROFILE_LEVELS[profile])
+        if unknown:
+            raise ValueError(f"Unknown severity levels for {profile} in {path}: {sorted(unknown)}")
+    logger.info(f"Loaded risk lexicon overrides from {path} ({', '.join(overrides)})")
+    lexicon = dict(DEFAULT_LEXICON)
+    for profile, levels in overrides.items():
+        # Levels left out of an override score 0 rather than disappear
+        lexicon[profile] = {level: levels.get(level, {}) for level in PROFILE_LEVELS[profile]}
+    return lexicon
+
+
+@lru_cache(maxsize=1)
+def get_risk_matcher() -> RiskTermMatcher:
+    """Process-wide matcher, compiled on first use"""
+    return RiskTermMatcher(load_lexicon())
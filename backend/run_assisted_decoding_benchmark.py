@@ -0,0 +1,77 @@
+"""
+Assisted Decoding Benchmark
+Tokens/s and end-to-end latency of flan-t5-large with a flan-t5-small draft
+vs the current sampled call (do_sample=True, max_length=300)
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from generation_backends import attach_draft_model, create_generation_backend
+from model_router import TIER_MODELS
+from run_onnx_benchmark import build_prompts
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_NEW_TOKENS = 200
+
+MODES = {
+    'sampled': dict(max_length=300, do_sample=True, temperature=0.3),
+    'greedy': dict(max_new_tokens=MAX_NEW_TOKENS),
+    'assisted': dict(max_new_tokens=MAX_NEW_TOKENS, assisted=True),
+}
+
+
+def main():
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    prompts = build_prompts()
+
+    target = create_generation_backend(TIER_MODELS['large'], backend='torch', encoder_cache_mb=0)
+    draft = create_generation_backend(TIER_MODELS['small'], backend='torch', encoder_cache_mb=0)
+    attach_draft_model(target, draft)
+    target.generate(prompts[0], max_new_tokens=8)  # warm-up
+
+    results, outputs = {}, {}
+    for mode, kwargs in MODES.items():
+        latencies, tokens = [], []
+        outputs[mode] = []
+        for prompt in prompts:
+            start = time.perf_counter()
+            text = target.generate(prompt, **kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+            tokens.append(len(target.tokenizer(text)['input_ids']))
+            outputs[mode].append(text)
+
+        results[mode] = {
+            'latency_ms_mean': float(np.mean(latencies)),
+            'latency_ms_p95': float(np.percentile(latencies, 95)),
+            'tokens_per_s': float(sum(tokens) / (sum(latencies) / 1000)),
+            'mean_output_tokens': float(np.mean(tokens)),
+        }
+        r = results[mode]
+        logger.info(f"{mode:<9} mean={r['latency_ms_mean']:.0f}ms p95={r['latency_ms_p95']:.0f}ms "
+                    f"{r['tokens_per_s']:.1f} tok/s")
+
+    # Assisted decoding must reproduce plain greedy output exactly
+    identical = float(np.mean([a == g for a, g in zip(outputs['assisted'], outputs['greedy'])]))
+    speedup = results['sampled']['latency_ms_mean'] / results['assisted']['latency_ms_mean']
+    logger.info(f"assisted == greedy on {identical * 100:.0f}% of prompts; "
+                f"{speedup:.2f}x faster than the sampled call")
+
+    os.makedirs('./results', exist_ok=True)
+    output_file = f'./results/assisted_decoding_benchmark_{timestamp}.json'
+    with open(output_file, 'w') as f:
+        json.dump({'timestamp': timestamp, 'modes': results,
+                   'assisted_matches_greedy': identical,
+                   'speedup_vs_sampled': speedup}, f, indent=2)
+    logger.info(f"\n✅ Results saved to: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
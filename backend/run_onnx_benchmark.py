@@ -0,0 +1,140 @@
+"""
+Generation Backend Benchmark
+Output parity, latency and memory of the ONNX int8 backend vs PyTorch fp32
+
+Each backend is loaded in a fresh process so peak memory is not shared.
+Generation is greedy so outputs are comparable token for token.
+"""
+
+import json
+import logging
+import multiprocessing as mp
+import os
+import resource
+import time
+from datetime import datetime
+
+import numpy as np
+
+from evaluation import GroundTruthDataset
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "google/flan-t5-large"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_backend(backend_name: str, prompts, queue):
+    from generation_backends import create_generation_backend
+
+    before = _peak_rss_mb()
+    start = time.perf_counter()
+    backend = create_generation_backend(MODEL_NAME, backend=backend_name)
+    load_s = time.perf_counter() - start
+
+    backend.generate(prompts[0], max_length=300)  # warm-up
+
+    outputs, latencies = [], []
+    for prompt in prompts:
+        start = time.perf_counter()
+        outputs.append(backend.generate(prompt, max_length=300, do_sample=False))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    queue.put({
+        'load_seconds': load_s,
+        'peak_rss_mb': _peak_rss_mb(),
+        'model_rss_mb': _peak_rss_mb() - before,
+        'latency_ms_mean': float(np.mean(latencies)),
+        'latency_ms_p50': float(np.percentile(latencies, 50)),
+        'latency_ms_p95': float(np.percentile(latencies, 95)),
+        'outputs': outputs,
+    })
+
+
+def _token_f1(a: str, b: str) -> float:
+    ta, tb = a.lower().split(), b.lower().split()
+    if not ta or not tb:
+        return float(ta == tb)
+    common = sum(min(ta.count(t), tb.count(t)) for t in set(ta))
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(ta), common / len(tb)
+    return 2 * precision * recall / (precision + recall)
+
+
+def build_prompts():
+    """
+    Evaluation-set prompts exactly as LocalLLMAgent builds them: sub-query
+    retrieval, then ContextPacker over the pre-tokenized chunks. The packed
+    ids are decoded back to text because the benchmarks call generate(prompt),
+    which re-encodes them (and adds the EOS back); any prompt whose ids do
+    not round-trip is reported.
+    """
+    from transformers import AutoTokenizer
+
+    from context_packer import ContextPacker, load_or_build_chunk_tokens
+    from drug_knowledge import expand_drug_subqueries
+    from generation_backends import MODEL_INPUT_LIMIT
+    from hybrid_retriever import create_hybrid_retriever
+
+    retriever = create_hybrid_retriever()
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    packer = ContextPacker(
+        tokenizer,
+        load_or_build_chunk_tokens(retriever.processor, tokenizer),
+        max_tokens=MODEL_INPUT_LIMIT,
+    )
+
+    prompts, mismatched = [], 0
+    for example in GroundTruthDataset().get_examples():
+        docs = retriever.search_many(expand_drug_subqueries(example['query']), top_k=4)
+        packed = packer.pack(example['query'], docs)
+        prompt = tokenizer.decode(packed['input_ids'], skip_special_tokens=True)
+        mismatched += tokenizer(prompt)['input_ids'] != packed['input_ids']
+        prompts.append(prompt)
+    if mismatched:
+        logger.warning(f"{mismatched}/{len(prompts)} decoded prompts re-tokenize differently from the packed ids")
+    return prompts
+
+
+def main():
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    prompts = build_prompts()
+    logger.info(f"Benchmarking {len(prompts)} evaluation prompts")
+
+    ctx = mp.get_context("spawn")
+    results = {}
+    for backend_name in ("torch", "onnx"):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(backend_name, prompts, queue))
+        proc.start()
+        results[backend_name] = queue.get()
+        proc.join()
+        r = results[backend_name]
+        logger.info(f"{backend_name:<6} mean={r['latency_ms_mean']:.0f}ms p95={r['latency_ms_p95']:.0f}ms "
+                    f"peak_rss={r['peak_rss_mb']:.0f}MB")
+
+    ref, onnx = results['torch']['outputs'], results['onnx']['outputs']
+    parity = {
+        'exact_match': float(np.mean([a.strip() == b.strip() for a, b in zip(ref, onnx)])),
+        'token_f1': float(np.mean([_token_f1(a, b) for a, b in zip(ref, onnx)])),
+        'speedup': results['torch']['latency_ms_mean'] / results['onnx']['latency_ms_mean'],
+    }
+    logger.info(f"Parity: exact={parity['exact_match']:.2f} token_f1={parity['token_f1']:.3f} "
+                f"speedup={parity['speedup']:.2f}x")
+
+    os.makedirs('./results', exist_ok=True)
+    output_file = f'./results/onnx_benchmark_{timestamp}.json'
+    with open(output_file, 'w') as f:
+        json.dump({'timestamp': timestamp, 'model': MODEL_NAME, 'backends': results,
+                   'parity': parity}, f, indent=2)
+    logger.info(f"\n✅ Results saved to: {output_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Cross-Encoder Re-Ranking Benchmark
+Per-query rerank() loop vs flattened, length-bucketed batch_rerank()
+
+Each batch size (1, 8, 64 queries) re-ranks 20 FAISS candidates per
+query both ways; scores must match, only the time spent differs.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from data_processor_drugbank import get_processor
+from evaluation import GroundTruthDataset
+from reranker import DrugInteractionReRanker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUERY_COUNTS = (1, 8, 64)
+NUM_CANDIDATES = 20
+
+
+class RerankBenchmark:
+    def __init__(self, repeats: int = 3, batch_size: int = None):
+        self.processor = get_processor()
+        self.reranker = DrugInteractionReRanker(batch_size=batch_size)
+        self.repeats = repeats
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Ground-truth queries, cycled up to the largest batch
+        base = [ex['query'] for ex in GroundTruthDataset().get_examples()]
+        self.queries = [base[i % len(base)] for i in range(max(QUERY_COUNTS))]
+        self.candidates = [self.processor.search(q, top_k=NUM_CANDIDATES) for q in self.queries]
+
+    def _time(self, fn):
+        latencies = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            result = fn()
+            latencies.append((time.perf_counter() - start) * 1000)
+        return result, float(np.median(latencies))
+
+    def run(self):
+        logger.info("=" * 80)
+        logger.info("CROSS-ENCODER RE-RANKING BENCHMARK")
+        logger.info("=" * 80)
+
+        # Warm up the cross-encoder
+        self.reranker.rerank(self.queries[0], self.candidates[0])
+
+        results = {}
+        for n in QUERY_COUNTS:
+            queries, docs = self.queries[:n], self.candidates[:n]
+
+            looped, loop_ms = self._time(
+                lambda: [self.reranker.rerank(q, d, NUM_CANDIDATES) for q, d in zip(queries, docs)]
+            )
+            batched, batch_ms = self._time(
+                lambda: self.reranker.batch_rerank(queries, docs, top_k=NUM_CANDIDATES)
+            )
+
+            max_diff = max(
+                abs(a['reranker_score'] - b['reranker_score'])
+                for la, lb in zip(looped, batched)
+                for a, b in zip(sorted(la, key=lambda x: x['chunk_row']), sorted(lb, key=lambda x: x['chunk_row']))
+            )
+            results[str(n)] = {
+                'pairs': sum(len(d) for d in docs),
+                'loop_ms': loop_ms,
+                'batch_ms': batch_ms,
+                'loop_ms_per_query': loop_ms / n,
+                'batch_ms_per_query': batch_ms / n,
+                'speedup': loop_ms / batch_ms if batch_ms else 0.0,
+                'max_score_diff': float(max_diff),
+            }
+            m = results[str(n)]
+            logger.info(
+                f"{n:>3} queries x {NUM_CANDIDATES}: loop={loop_ms:.1f}ms batch={batch_ms:.1f}ms "
+                f"speedup={m['speedup']:.2f}x max_diff={max_diff:.2e}"
+            )
+
+        os.makedirs('./results', exist_ok=True)
+        output_file = f'./results/rerank_benchmark_{self.timestamp}.json'
+        with open(output_file, 'w') as f:
+            json.dump({
+                'timestamp': self.timestamp,
+                'batch_size': self.reranker.batch_size,
+                'candidates_per_query': NUM_CANDIDATES,
+                'results': results,
+            }, f, indent=2)
+
+        logger.info(f"\n✅ Results saved to: {output_file}")
+        return results
+
+
+if __name__ == '__main__':
+    RerankBenchmark().run()
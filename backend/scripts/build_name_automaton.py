@@ -0,0 +1,39 @@
+# scripts/build_name_automaton.py
+"""
+Build the drug name automaton and fuzzy index used by drug_name_extractor.
+
+Compiles every graph drug name plus the synonyms / brand names in
+drug_knowledge.DRUG_SYNONYMS into an Aho-Corasick automaton and a
+SymSpell deletion index, collects the words fuzzy matching must leave
+alone (common English and the interaction-description vocabulary), and
+pickles all three next to the graph snapshot, so API workers only load
+them. Run after the graph is rebuilt.
+
+Usage (from backend/):
+    python scripts/build_name_automaton.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drug_name_extractor import AUTOMATON_PATH, build_name_indexes, find_drug_mentions  # noqa: E402
+from graph_snapshot import get_graph  # noqa: E402
+
+
+def main():
+    start = time.perf_counter()
+    indexes = build_name_indexes(get_graph())
+    automaton, fuzzy = indexes["automaton"], indexes["fuzzy"]
+    print(f"✅ {len(automaton)} surface forms, {len(automaton.goto)} states, "
+          f"{len(fuzzy.index)} fuzzy deletes in {time.perf_counter() - start:.2f}s -> {AUTOMATON_PATH}")
+
+    for example in ("Can I take Coumadin with ibuprofen?", "Can I take warfrin with ibuprofin?"):
+        mentions = find_drug_mentions(example)
+        print(f"  {example!r}: {[(m.name, m.start, m.end, m.distance) for m in mentions]}")
+
+
+if __name__ == "__main__":
+    main()
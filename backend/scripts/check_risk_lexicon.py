@@ -0,0 +1,61 @@
+# scripts/check_risk_lexicon.py
+"""
+Regression check for the risk lexicon.
+
+Scores fixed example sentences with every assessor profile and compares
+the per-level hits with the expected values. The first group reproduces
+what the original `keyword in text` checks gave; the second pins the
+intended differences (word-start boundaries, negation). Run after
+editing risk_lexicon.DEFAULT_LEXICON or a RISK_LEXICON_PATH override;
+exits non-zero on any mismatch.
+
+Usage (from backend/):
+    python scripts/check_risk_lexicon.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_lexicon import get_risk_matcher  # noqa: E402
+
+# (profile, text, expected hits per level)
+EXAMPLES = [
+    # Same as the substring checks
+    ("retrieval", "Fatal bleeding can occur; the risk is increased.",
+     {"high": 2, "moderate": 1, "low": 0}),
+    ("retrieval", "Monitoring is advised; dose adjustment may be needed.",
+     {"high": 0, "moderate": 2, "low": 0}),
+    ("retrieval", "This interaction is minor and unlikely to affect therapy.",
+     {"high": 0, "moderate": 2, "low": 2}),
+    ("generation", "Severe hypotension may occur.", {"high": 1, "moderate": 0}),
+    ("generation", "Bleeding and toxic effects are possible.", {"high": 0, "moderate": 0}),
+    ("generation", "These drugs increase risk of myopathy; monitor CK.", {"high": 0, "moderate": 2}),
+    ("graph", "Severe serotonin syndrome has been reported.",
+     {"contraindicated": 1, "major": 0, "moderate": 0}),
+    ("graph", "A significant increase in exposure is expected.",
+     {"contraindicated": 0, "major": 1, "moderate": 0}),
+    ("graph", "Use with caution.", {"contraindicated": 0, "major": 0, "moderate": 1}),
+    # Intended differences
+    ("retrieval", "Unsafe combination.", {"high": 0, "moderate": 0, "low": 0}),  # "safe" not inside "unsafe"
+    ("retrieval", "May increase the nephrotoxic activities.", {"high": 0, "moderate": 1, "low": 0}),
+    ("retrieval", "No bleeding was observed.", {"high": 0, "moderate": 0, "low": 0}),  # negated
+    ("graph", "No significant interaction.", {"contraindicated": 0, "major": 0, "moderate": 0}),
+]
+
+
+def main():
+    matcher = get_risk_matcher()
+    failures = 0
+    for profile, text, expected in EXAMPLES:
+        scores = matcher.score(text, profile)
+        ok = all(scores.get(level, 0.0) == hits for level, hits in expected.items())
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} [{profile}] {text!r}: {scores}")
+    print(f"{len(EXAMPLES) - failures}/{len(EXAMPLES)} examples match")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
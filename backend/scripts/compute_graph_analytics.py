@@ -0,0 +1,45 @@
+# scripts/compute_graph_analytics.py
+"""
+Compute centrality, communities and degree rankings for the interaction graph.
+
+Results go to data/graph_analytics.json together with the graph version;
+/api/graph/analytics serves them from there and reports "computing" while
+this script runs. The API server never computes them itself, so run this
+after every graph rebuild (or from cron). Nothing is recomputed when
+the file already matches the current graph unless --force is given, so
+repeated runs are cheap.
+
+Usage (from backend/):
+    python scripts/compute_graph_analytics.py --samples 512
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_analytics import ANALYTICS_PATH, DEFAULT_SAMPLES, GraphAnalyticsStore  # noqa: E402
+from graph_snapshot import get_graph  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute cached graph analytics")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                        help="source nodes sampled for approximate betweenness")
+    parser.add_argument("--output", default=ANALYTICS_PATH)
+    parser.add_argument("--force", action="store_true", help="recompute even if up to date")
+    args = parser.parse_args()
+
+    store = GraphAnalyticsStore(args.output, samples=args.samples)
+    result = store.refresh(get_graph(), force=args.force)
+
+    print(f"✅ Graph analytics for version {result['version']} "
+          f"({result['num_nodes']} drugs, {result['num_edges']} interactions, "
+          f"{len(result['communities'])} communities) in {args.output}")
+    for row in result["betweenness"][:10]:
+        print(f"  {row['drug']:<30} {row['betweenness']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# scripts/precompute_answers.py
+"""
+Precompute full responses for the highest-traffic drug pairs.
+
+Pairs are ranked by how often they were asked (the Mongo `queries`
+collection, pairs extracted with the same extractor the agent uses),
+then topped up with the pairs of the highest-degree drugs in the
+interaction graph. Answers are generated with LocalLLMAgent.answer_batch
+(batched greedy FLAN-T5) and stored in the `precomputed_answers`
+collection, which /api/query consults before running the pipeline.
+
+Entries that are still fresh for the current index / model versions are
+skipped unless --force is given, so this is cheap to run nightly.
+
+Usage (from backend/):
+    python scripts/precompute_answers.py --top 300 --batch-size 16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from answer_store import PrecomputedAnswerStore, is_interaction_query, pair_key  # noqa: E402
+from drug_name_extractor import extract_drug_pair_from_query  # noqa: E402
+from local_llm_agent import create_local_llm_agent  # noqa: E402
+
+QUERY_TEMPLATE = "What are the interactions between {} and {}?"
+
+
+async def pairs_by_traffic(db):
+    """Interaction-query count per drug pair, plus the display names of each pair"""
+    counts = Counter()
+    names = {}
+    async for doc in db.queries.find({}, {"_id": 0, "query": 1}):
+        if not is_interaction_query(doc.get("query", "")):
+            continue  # only plain interaction questions are served from the store
+        drug_a, drug_b = extract_drug_pair_from_query(doc.get("query", ""))
+        if drug_a and drug_b:
+            key = pair_key(drug_a, drug_b)
+            counts[key] += 1
+            names[key] = (drug_a, drug_b)
+    return counts, names
+
+
+def pairs_by_degree(graph, limit: int):
+    """Edges whose endpoints have the highest combined degree"""
+    degree = graph.degrees()
+    score = degree[graph.edge_a] + degree[graph.edge_b]
+    top = np.argsort(-score, kind="stable")[:limit]
+    return [(graph.names[graph.edge_a[e]], graph.names[graph.edge_b[e]]) for e in top]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Precompute answers for high-traffic drug pairs")
+    parser.add_argument("--top", type=int, default=300, help="number of pairs to keep answered")
+    parser.add_argument("--batch-size", type=int, default=16, help="prompts per generate() call")
+    parser.add_argument("--force", action="store_true", help="regenerate fresh entries too")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+
+    agent = create_local_llm_agent()
+    store = PrecomputedAnswerStore(db, agent.answer_versions())
+    await store.ensure_indexes()
+
+    # 1. Rank pairs: observed traffic first, then graph hubs
+    traffic, names = await pairs_by_traffic(db)
+    selected = [names[key] for key, _ in traffic.most_common(args.top)]
+    seen = {pair_key(a, b) for a, b in selected}
+    for a, b in pairs_by_degree(agent.graph, args.top):
+        if len(selected) >= args.top:
+            break
+        if pair_key(a, b) not in seen:
+            selected.append((a, b))
+            seen.add(pair_key(a, b))
+
+    # 2. Skip entries that are still valid for this index / model
+    if not args.force:
+        fresh = await store.fresh_keys()
+        selected = [(a, b) for a, b in selected if pair_key(a, b) not in fresh]
+    print(f"{len(selected)} pairs to (re)generate "
+          f"({len(traffic)} distinct pairs in query history)")
+
+    # 3. Generate in large batches and store
+    start = time.perf_counter()
+    chunk = args.batch_size * 4
+    for i in range(0, len(selected), chunk):
+        pairs = selected[i:i + chunk]
+        queries = [QUERY_TEMPLATE.format(a, b) for a, b in pairs]
+        results = agent.answer_batch(queries, batch_size=args.batch_size)
+        for (a, b), result in zip(pairs, results):
+            await store.store(a, b, result, traffic=traffic.get(pair_key(a, b), 0))
+        print(f"  stored {i + len(pairs)}/{len(selected)}")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Precomputed {len(selected)} answers in {elapsed:.1f}s "
+          f"(index {store.versions['index_version']}, model {store.versions['model_version']})")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
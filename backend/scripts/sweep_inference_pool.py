@@ -0,0 +1,107 @@
+# scripts/sweep_inference_pool.py
+"""
+Find the best workers × threads split of the FLAN-T5 inference pool for this host.
+
+For every split that fits the available cores, start an InferencePool,
+warm every worker up, then push a fixed batch of prompts through it with
+enough requests in flight to keep all workers busy. Reports throughput
+and latency per split and the best setting for INFERENCE_WORKERS /
+INFERENCE_THREADS.
+
+Usage (from backend/):
+    python scripts/sweep_inference_pool.py --model google/flan-t5-large --requests 64
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import wait
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_pool import InferencePool, available_cores  # noqa: E402
+from run_onnx_benchmark import build_prompts  # noqa: E402
+
+
+def candidate_splits(num_cores: int):
+    """All workers × threads with threads a power of two that use at most num_cores"""
+    threads = 1
+    while threads <= num_cores:
+        for workers in sorted({1, 2, num_cores // threads // 2, num_cores // threads}):
+            if workers >= 1 and workers * threads <= num_cores:
+                yield workers, threads
+        threads *= 2
+
+
+def run_split(model_name: str, workers: int, threads: int, prompts, num_requests: int,
+              max_new_tokens: int):
+    pool = InferencePool(workers, threads)
+    try:
+        generator = pool.backend_for(model_name)
+        encoded = [generator.tokenizer(p)["input_ids"] for p in prompts]
+
+        # Warm-up: enough calls that every worker has loaded the model
+        wait([pool.submit(model_name, encoded[0], max_new_tokens=4) for _ in range(workers * 2)])
+
+        submitted = {}
+        start = time.perf_counter()
+        for i in range(num_requests):
+            submitted[pool.submit(model_name, encoded[i % len(encoded)],
+                                  max_new_tokens=max_new_tokens)] = time.perf_counter()
+
+        latencies = []
+        for future, sent in submitted.items():
+            future.result()
+            latencies.append((time.perf_counter() - sent) * 1000)
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+    return {
+        "workers": workers,
+        "threads": threads,
+        "throughput_rps": num_requests / elapsed,
+        "latency_ms_p50": float(np.percentile(latencies, 50)),
+        "latency_ms_p95": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep inference pool workers × threads")
+    parser.add_argument("--model", default="google/flan-t5-large")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--out", default="./results")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    prompts = build_prompts()
+    print(f"Sweeping {args.model} on {len(cores)} cores, {args.requests} requests per split")
+
+    rows = []
+    for workers, threads in candidate_splits(len(cores)):
+        row = run_split(args.model, workers, threads, prompts, args.requests, args.max_new_tokens)
+        rows.append(row)
+        print(f"{workers:>3} x {threads:<3} {row['throughput_rps']:7.2f} req/s  "
+              f"p50={row['latency_ms_p50']:.0f}ms p95={row['latency_ms_p95']:.0f}ms")
+
+    best = max(rows, key=lambda r: r["throughput_rps"])
+    print(f"\n✅ Best split: INFERENCE_WORKERS={best['workers']} INFERENCE_THREADS={best['threads']} "
+          f"({best['throughput_rps']:.2f} req/s)")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(args.out, exist_ok=True)
+    output_file = os.path.join(args.out, f"inference_pool_sweep_{timestamp}.json")
+    with open(output_file, "w") as f:
+        json.dump({"timestamp": timestamp, "model": args.model, "cores": len(cores),
+                   "splits": rows, "best": best}, f, indent=2)
+    print(f"Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,21 @@ from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 import json
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import uuid
 from datetime import datetime, timezone
 
 # --- Changed Imports ---
 # from agents import GroundedRAGSystem  <-- Removed to avoid Gemini dependency
 from retrieval_only_agent import create_retrieval_only_agent
-from local_llm_agent import create_local_llm_agent
+from local_llm_agent import MAX_REGIMEN_DRUGS, create_local_llm_agent
+from answer_store import PrecomputedAnswerStore
+from graph_analytics import GraphAnalyticsStore
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -43,6 +46,12 @@ except Exception as e:
     logger.error(f"Failed to initialize Local LLM: {e}")
     raise e
 
+# 3. Precomputed answers for high-traffic drug pairs (scripts/precompute_answers.py)
+answer_store = PrecomputedAnswerStore(db, local_llm_system.answer_versions())
+
+# 4. Graph analytics (computed out of process by scripts/compute_graph_analytics.py)
+graph_analytics = GraphAnalyticsStore()
+
 # Create the main app
 app = FastAPI(title="Local Drug Interaction RAG System")
 api_router = APIRouter(prefix="/api")
@@ -51,6 +60,11 @@ api_router = APIRouter(prefix="/api")
 class QueryRequest(BaseModel):
     query: str
     user_id: Optional[str] = "anonymous"
+    latency_budget_ms: Optional[float] = None
+
+class RegimenRequest(BaseModel):
+    drugs: List[str]
+    summarize: bool = True
 
 class Citation(BaseModel):
     id: int
@@ -69,6 +83,7 @@ class QueryResponse(BaseModel):
     grounding_score: float
     sub_queries: List[str]
     num_retrieved_docs: int
+    metadata: Dict[str, Any] = Field(default_factory=dict)
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     user_id: str = "anonymous"
 
@@ -87,17 +102,40 @@ class HistoryItem(BaseModel):
 async def root():
     return {"message": "Local Drug Interaction RAG System API", "status": "active", "model": "FLAN-T5-Large"}
 
+# Background explanation tasks for fast-path answers (kept referenced until done)
+explanation_tasks = set()
+
+async def attach_explanation(query_id: str, query: str, retrieved_docs, risk_score):
+    """Generate the FLAN-T5 explanation for a template answer and store it on the query record"""
+    try:
+        explanation = await local_llm_system.generate_explanation(query, retrieved_docs, risk_score)
+        update = {"explanation": explanation, "explanation_status": "ready"}
+    except Exception as e:
+        logger.warning(f"Background explanation failed for {query_id}: {e}")
+        update = {"explanation_status": "failed"}
+    await db.queries.update_one({"id": query_id}, {"$set": update})
+
 @api_router.post("/query", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
     """Process a drug interaction query using Local LLM"""
     try:
         logger.info(f"Received query: {request.query}")
         
-        # PRIMARY: Use Local LLM
+        # PRIMARY: Use Local LLM (precomputed answer first, when fresh)
         try:
-            logger.info("Processing with Local LLM...")
-            result = await local_llm_system.process_query(request.query)
-            logger.info("✅ Generated response with Local LLM")
+            try:
+                result = await answer_store.lookup(request.query)
+            except Exception as store_error:
+                logger.warning(f"Precomputed answer lookup failed: {store_error}. Using Local LLM.")
+                result = None
+            if result is not None:
+                logger.info("✅ Served precomputed answer")
+            else:
+                logger.info("Processing with Local LLM...")
+                result = await local_llm_system.process_query(
+                    request.query, latency_budget_ms=request.latency_budget_ms
+                )
+                logger.info("✅ Generated response with Local LLM")
             
         except Exception as local_error:
             logger.warning(f"Local LLM failed: {local_error}. Falling back to Retrieval Only.")
@@ -111,7 +149,8 @@ async def process_query(request: QueryRequest):
                 'citations': retrieval_result['citations'],
                 'grounding_score': 1.0, # Retrieval is always grounded
                 'sub_queries': [request.query],
-                'num_retrieved_docs': retrieval_result['num_docs']
+                'num_retrieved_docs': retrieval_result['num_docs'],
+                'metadata': {'fallback': 'retrieval_only'}
             }
         
         # Create response object
@@ -123,6 +162,7 @@ async def process_query(request: QueryRequest):
             grounding_score=result.get('grounding_score', 0.0),
             sub_queries=result.get('sub_queries', []),
             num_retrieved_docs=result.get('num_retrieved_docs', 0),
+            metadata=result.get('metadata', {}),
             user_id=request.user_id
         )
         
@@ -131,6 +171,14 @@ async def process_query(request: QueryRequest):
         doc['timestamp'] = doc['timestamp'].isoformat()
         doc['citations'] = [c.model_dump() for c in response.citations]
         await db.queries.insert_one(doc)
+
+        # Template fast path: fill in the generated explanation off the request path
+        if response.metadata.get('explanation_pending'):
+            task = asyncio.create_task(attach_explanation(
+                response.id, request.query, result.get('retrieved_docs', []), response.risk_score
+            ))
+            explanation_tasks.add(task)
+            task.add_done_callback(explanation_tasks.discard)
         
         return response
         
@@ -138,6 +186,33 @@ async def process_query(request: QueryRequest):
         logger.error(f"Error processing query: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+@api_router.get("/query/{query_id}/explanation")
+async def get_explanation(query_id: str):
+    """Poll for the background explanation of a fast-path answer"""
+    doc = await db.queries.find_one(
+        {"id": query_id}, {"_id": 0, "explanation": 1, "explanation_status": 1}
+    )
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Query not found")
+    return {
+        "id": query_id,
+        "status": doc.get("explanation_status", "pending"),
+        "explanation": doc.get("explanation"),
+    }
+
+@api_router.post("/regimen/check")
+async def check_regimen(request: RegimenRequest):
+    """All pairwise interactions in a medication list, with at most one generated summary"""
+    if len(request.drugs) < 2:
+        raise HTTPException(status_code=400, detail="Provide at least two drugs")
+    if len(request.drugs) > MAX_REGIMEN_DRUGS:
+        raise HTTPException(status_code=400, detail=f"Provide at most {MAX_REGIMEN_DRUGS} drugs")
+    try:
+        return await local_llm_system.check_regimen(request.drugs, summarize=request.summarize)
+    except Exception as e:
+        logger.error(f"Error checking regimen: {e}")
+        raise HTTPException(status_code=500, detail=f"Error checking regimen: {str(e)}")
+
 @api_router.get("/history", response_model=List[HistoryItem])
 async def get_history(user_id: str = "anonymous", limit: int = 20):
     """Get query history for a user"""
@@ -183,6 +258,7 @@ async def get_system_info():
     return {
         "system_type": "Local RAG",
         "llm_model": "google/flan-t5-large",
+        "llm_tiers": local_llm_system.router.tiers,
         "embedding_model": "all-MiniLM-L6-v2",
         "vector_db": "FAISS",
         "status": "Operational",
@@ -192,6 +268,47 @@ async def get_system_info():
         }
     }
 
+@api_router.get("/metrics")
+async def get_metrics():
+    """Live generation metrics: model routing per FLAN-T5 tier and encoder cache hit rates"""
+    return {
+        "model_routing": local_llm_system.router.metrics(),
+        "encoder_cache": {
+            tier: generator.encoder_cache.stats()
+            for tier, generator in local_llm_system.generators.items()
+            if generator.encoder_cache is not None
+        },
+        "precomputed_answers": answer_store.stats(),
+        "inference_pool": (
+            local_llm_system.inference_pool.describe()
+            if local_llm_system.inference_pool is not None else None
+        ),
+    }
+
+@api_router.get("/graph/analytics")
+async def get_graph_analytics(top_n: int = 20):
+    """Cached centrality, communities and degree rankings for the current graph version"""
+    result = graph_analytics.current(local_llm_system.graph)
+    if result is None:
+        return {
+            "status": graph_analytics.status(local_llm_system.graph),
+            "detail": "Run scripts/compute_graph_analytics.py to compute analytics for the current graph",
+        }
+    return {
+        "status": "ready",
+        "version": result["version"],
+        "computed_at": result["computed_at"],
+        "num_nodes": result["num_nodes"],
+        "num_edges": result["num_edges"],
+        "betweenness_samples": result["betweenness_samples"],
+        "degree": result["degree"][:top_n],
+        "betweenness": result["betweenness"][:top_n],
+        "communities": [
+            {"id": c["id"], "size": c["size"], "members": c["members"][:top_n]}
+            for c in result["communities"][:top_n]
+        ],
+    }
+
 @api_router.get("/evaluation/results")
 async def get_evaluation_results():
     """Get latest evaluation results"""
@@ -245,4 +362,7 @@ async def startup_event():
     logger.info("Starting up... Initializing DrugBank data processor")
     from data_processor_drugbank import get_processor
     get_processor()
-    logger.info("DrugBank data processor initialized")
\ No newline at end of file
+    logger.info("DrugBank data processor initialized")
+    await answer_store.ensure_indexes()
+    if graph_analytics.current(local_llm_system.graph) is None:
+        logger.info("Graph analytics missing or stale; run scripts/compute_graph_analytics.py")
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Per-Chunk Severity Scores
+Cosine similarity of every chunk to the S0–S3 ontology concepts, computed at index time
+
+The ontology fallback used to embed the generated summary plus all
+retrieved texts as one string on every request (and MiniLM truncated it
+anyway). Chunk scores are now a (num_chunks, num_concepts) float16 array;
+at query time only the short summary is encoded and the retrieved rows
+are looked up.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from data_processor_drugbank import fingerprint_chunks
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def concepts_signature(concepts: List[Dict]) -> str:
+    """Scores are stale when concept definitions change"""
+    digest = hashlib.sha1()
+    for concept in concepts:
+        digest.update(f"{concept['id']}\0{concept['term']}\0".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class ChunkSeverityScores:
+    def __init__(self, scores: np.ndarray, fingerprint: str = "", signature: str = ""):
+        self.scores = scores
+        self.fingerprint = fingerprint
+        self.signature = signature
+
+    def for_rows(self, rows: List[int]) -> np.ndarray:
+        return self.scores[rows].astype(np.float32)
+
+    @classmethod
+    def build(cls, chunks: List[Dict], model, concept_embeddings: np.ndarray,
+              fingerprint: str = "", signature: str = "", batch_size: int = 256) -> "ChunkSeverityScores":
+        logger.info(f"Scoring {len(chunks)} chunks against {len(concept_embeddings)} severity concepts...")
+        chunk_embeddings = model.encode(
+            [c.get("text", "") for c in chunks], batch_size=batch_size,
+            normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=True,
+        )
+        scores = (chunk_embeddings @ concept_embeddings.T).astype(np.float16)
+        return cls(scores, fingerprint, signature)
+
+    def save(self, path: str):
+        np.savez(path, scores=self.scores, fingerprint=np.asarray(self.fingerprint),
+                 signature=np.asarray(self.signature))
+
+    @classmethod
+    def load(cls, path: str) -> "ChunkSeverityScores":
+        with np.load(path) as f:
+            return cls(f["scores"], str(f["fingerprint"]), str(f["signature"]))
+
+
+def load_or_build_severity_scores(processor, model, concepts: List[Dict], concept_embeddings: np.ndarray,
+                                  filename: str = "chunk_severity_scores.npz") -> ChunkSeverityScores:
+    """Severity scores stored next to the FAISS index, rebuilt when chunks or concepts change"""
+    path = os.path.join(processor.data_dir, filename)
+    fingerprint = fingerprint_chunks(processor.chunks)
+    signature = concepts_signature(concepts)
+
+    if os.path.exists(path):
+        store = ChunkSeverityScores.load(path)
+        if store.fingerprint == fingerprint and store.signature == signature:
+            logger.info(f"Loaded chunk severity scores from {path}")
+            return store
+        logger.info("Chunk severity scores are stale, rebuilding...")
+
+    store = ChunkSeverityScores.build(processor.chunks, model, concept_embeddings, fingerprint, signature)
+    store.save(path)
+    return store
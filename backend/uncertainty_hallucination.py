@@ -0,0 +1,213 @@
+"""
+Uncertainty Quantification, Grounding Verification and Confidence Scoring
+Self-consistency uncertainty and sentence-level grounding for local FLAN-T5 answers
+
+All samples for a query come from ONE generate() call
+(num_return_sequences), so the encoder runs once and the decoder
+produces the samples as a batch. Agreement between samples is measured
+on one batched MiniLM embedding of all of them, so uncertainty costs
+roughly one generation instead of N.
+
+Grounding compares each response sentence (claim) with the evidence
+sentences of the retrieved chunks. Evidence embeddings are precomputed
+at index time and memory-mapped (evidence_store.py); only the claims are
+encoded per request, in one batch.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from evidence_store import EvidenceSentenceStore, load_or_build_evidence_store, split_sentences
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+class UncertaintyQuantifier:
+    """
+    Multi-sample uncertainty on top of LocalGenerationAgent.
+
+    The returned answer is the medoid sample (the one most similar to all
+    others); agreement is the mean pairwise cosine similarity of the
+    samples, and risk consistency the share of samples whose risk label
+    matches the majority.
+    """
+
+    def __init__(self, generation_agent, embedding_model: Optional[SentenceTransformer] = None,
+                 temperature: float = 0.7, max_length: int = 256):
+        self.generation_agent = generation_agent
+        self.embedding_model = embedding_model or SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+        self.temperature = temperature
+        self.max_length = max_length
+
+    def sample(self, prompt: str, num_samples: int) -> List[str]:
+        """num_samples answers from a single generate() call"""
+        outputs = self.generation_agent.generator(
+            prompt,
+            max_length=self.max_length,
+            do_sample=True,
+            temperature=self.temperature,
+            num_return_sequences=num_samples,
+        )
+        return [o["generated_text"] for o in outputs]
+
+    def agreement(self, samples: List[str]) -> Dict:
+        """Pairwise semantic agreement from one batched embedding"""
+        if len(samples) < 2:
+            return {"agreement": 1.0, "medoid": 0, "pairwise_min": 1.0}
+
+        embeddings = self.embedding_model.encode(
+            samples, batch_size=len(samples), normalize_embeddings=True, convert_to_numpy=True
+        )
+        similarity = embeddings @ embeddings.T
+        n = len(samples)
+        off_diagonal = similarity[~np.eye(n, dtype=bool)]
+        return {
+            "agreement": float(off_diagonal.mean()),
+            "medoid": int((similarity.sum(axis=1) - 1.0).argmax()),
+            "pairwise_min": float(off_diagonal.min()),
+        }
+
+    def _predict(self, query: str, docs: List[Dict], num_samples: int) -> Dict:
+        agent = self.generation_agent
+        prompt, context_text, citations = agent.build_prompt(query, docs)
+
+        samples = self.sample(prompt, num_samples)
+        stats = self.agreement(samples)
+
+        risks = [agent._calculate_risk(s + context_text) for s in samples]
+        majority_risk, majority_count = Counter(risks).most_common(1)[0]
+
+        response = samples[stats["medoid"]]
+        return {
+            "response": response,
+            "risk_score": majority_risk,
+            "citations": citations,
+            "grounding_score": 0.85,  # replaced by GroundingVerifier when enabled
+            "uncertainty": {
+                "num_samples": len(samples),
+                "agreement": stats["agreement"],
+                "pairwise_min": stats["pairwise_min"],
+                "uncertainty": 1.0 - stats["agreement"],
+                "risk_consistency": majority_count / len(samples),
+                "risk_votes": dict(Counter(risks)),
+            },
+        }
+
+    async def predict_with_uncertainty(self, query: str, docs: List[Dict],
+                                       num_samples: int = 5) -> Dict:
+        """Generate with uncertainty estimate (runs off the event loop)"""
+        return await asyncio.to_thread(self._predict, query, docs, num_samples)
+
+    @staticmethod
+    def calculate_retrieval_uncertainty(docs: List[Dict]) -> Dict:
+        """Confidence from the spread of retrieval scores"""
+        scores = np.array([d.get("relevance_score", 0.0) for d in docs], dtype=np.float32)
+        if scores.size == 0:
+            return {"retrieval_confidence": 0.0, "score_mean": 0.0, "score_std": 0.0, "top_margin": 0.0}
+
+        ordered = np.sort(scores)[::-1]
+        top_margin = float(ordered[0] - ordered[1]) if scores.size > 1 else float(ordered[0])
+        return {
+            "retrieval_confidence": float(np.clip(ordered[:3].mean(), 0.0, 1.0)),
+            "score_mean": float(scores.mean()),
+            "score_std": float(scores.std()),
+            "top_margin": top_margin,
+        }
+
+
+class GroundingVerifier:
+    """
+    A claim is supported when its best cosine similarity to any evidence
+    sentence of the retrieved chunks reaches `support_threshold`.
+    """
+
+    def __init__(self, embedding_model: Optional[SentenceTransformer] = None,
+                 store: Optional[EvidenceSentenceStore] = None, processor=None,
+                 support_threshold: float = 0.6):
+        self.embedding_model = embedding_model or SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+        if store is None:
+            from data_processor_drugbank import get_processor
+
+            store = load_or_build_evidence_store(processor or get_processor(), self.embedding_model)
+        self.store = store
+        self.support_threshold = support_threshold
+
+    def verify_response(self, response: str, docs: List[Dict]) -> Dict:
+        claims = split_sentences(response)
+        rows = list(dict.fromkeys(d["chunk_row"] for d in docs if d.get("chunk_row") is not None))
+        evidence, owners = self.store.for_rows(rows)
+
+        if not claims or evidence.shape[0] == 0:
+            return {
+                "grounding_score": 0.0,
+                "hallucination_rate": 1.0 if claims else 0.0,
+                "num_claims": len(claims),
+                "supported_claims": 0,
+                "claims": [],
+            }
+
+        claim_embeddings = self.embedding_model.encode(
+            claims, batch_size=len(claims), normalize_embeddings=True, convert_to_numpy=True
+        )
+        similarity = claim_embeddings @ evidence.T
+        best = similarity.argmax(axis=1)
+        best_scores = similarity[np.arange(len(claims)), best]
+        supported = best_scores >= self.support_threshold
+
+        return {
+            "grounding_score": float(supported.mean()),
+            "hallucination_rate": float(1.0 - supported.mean()),
+            "mean_support": float(best_scores.mean()),
+            "num_claims": len(claims),
+            "supported_claims": int(supported.sum()),
+            "claims": [
+                {
+                    "text": claim,
+                    "support": float(score),
+                    "supported": bool(ok),
+                    "evidence_chunk_row": int(owners[idx]),
+                }
+                for claim, score, ok, idx in zip(claims, best_scores, supported, best)
+            ],
+        }
+
+
+class ConfidenceScorer:
+    """Combine generation, retrieval and grounding signals into one score"""
+
+    WEIGHTS = {"generation": 0.4, "retrieval": 0.3, "grounding": 0.3}
+    LEVELS = ((0.75, "HIGH"), (0.5, "MEDIUM"), (0.0, "LOW"))
+
+    def calculate_overall_confidence(self, result: Dict,
+                                     retrieval_uncertainty: Optional[Dict] = None,
+                                     grounding_metrics: Optional[Dict] = None) -> Dict:
+        components = {}
+        if result.get("uncertainty"):
+            u = result["uncertainty"]
+            components["generation"] = float(np.clip(u["agreement"], 0.0, 1.0)) * u["risk_consistency"]
+        if retrieval_uncertainty:
+            components["retrieval"] = retrieval_uncertainty["retrieval_confidence"]
+        if grounding_metrics:
+            components["grounding"] = grounding_metrics["grounding_score"]
+
+        # Renormalize over the signals that are available
+        total_weight = sum(self.WEIGHTS[k] for k in components)
+        overall = (
+            sum(self.WEIGHTS[k] * v for k, v in components.items()) / total_weight
+            if total_weight else 0.0
+        )
+        level = next(label for threshold, label in self.LEVELS if overall >= threshold)
+
+        return {
+            "overall_confidence": overall,
+            "confidence_level": level,
+            "components": components,
+        }